@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+
+class AdminCache:
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self._entries = {}
+        self._pending = {}
+
+    async def get(self, bot, chat_id: int):
+        entry = self._entries.get(chat_id)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+
+        task = self._pending.get(chat_id)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(bot, chat_id))
+            self._pending[chat_id] = task
+        return await asyncio.shield(task)
+
+    async def _fetch(self, bot, chat_id: int):
+        task = asyncio.current_task()
+        try:
+            admins = await bot.get_chat_administrators(chat_id)
+            if self._pending.get(chat_id) is task:
+                self._entries[chat_id] = (time.monotonic(), admins)
+            return admins
+        finally:
+            if self._pending.get(chat_id) is task:
+                del self._pending[chat_id]
+
+    def invalidate(self, chat_id: int = None):
+        if chat_id is None:
+            self._entries.clear()
+            self._pending.clear()
+        else:
+            self._entries.pop(chat_id, None)
+            self._pending.pop(chat_id, None)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,193 @@
+import argparse
+import hashlib
+import json
+import random
+import re
+import statistics
+import time
+
+from main import Karadevfacekid
+from matcher import word_pattern
+
+GOLDEN_FILE = "golden_verdicts.jsonl"
+GOLDEN_SEED = 20240101
+GOLDEN_COUNT = 300
+
+CLEAN_WORDS = [
+    "привет", "как", "дела", "сегодня", "завтра", "вечером", "встреча", "погода", "хорошая", "отличная",
+    "спасибо", "пожалуйста", "давай", "пойдём", "кино", "работа", "проект", "код", "сервер", "бот",
+    "чат", "группа", "новости", "вопрос", "ответ", "думаю", "знаю", "может", "конечно", "нет",
+    "да", "тоже", "очень", "немного", "быстро", "медленно", "дом", "улица", "город", "машина",
+    "кофе", "чай", "обед", "ужин", "выходные", "праздник", "подарок", "друг", "коллега", "семья",
+    "игра", "матч", "команда", "счёт", "время", "минута", "час", "неделя", "месяц", "год",
+    "в", "на", "с", "и", "но", "что", "это", "мы", "вы", "они",
+]
+SEPARATORS = [" ", "-", ".", "*", "_", " . ", "!!"]
+
+
+def message_length(rng: random.Random) -> int:
+    return max(1, min(600, int(rng.lognormvariate(1.8, 0.9))))
+
+
+def clean_message(rng: random.Random) -> str:
+    text = " ".join(rng.choice(CLEAN_WORDS) for _ in range(message_length(rng)))
+    if rng.random() < 0.02:
+        text = (text + " ") * (4096 // (len(text) + 1))
+    return text[:4096]
+
+
+def dirty_message(rng: random.Random, bad_words) -> str:
+    words = [rng.choice(CLEAN_WORDS) for _ in range(message_length(rng))]
+    words.insert(rng.randrange(len(words) + 1), rng.choice(bad_words))
+    return " ".join(words)[:4096]
+
+
+def obfuscate(rng: random.Random, word: str) -> str:
+    result = ""
+    for char in word:
+        if char.isalpha() and rng.random() < 0.3:
+            char = char * rng.randint(2, 4)
+        if rng.random() < 0.2:
+            char = char.upper()
+        result += char
+        if char.isalpha() and rng.random() < 0.25:
+            result += rng.choice(SEPARATORS)
+    return result
+
+
+def obfuscated_message(rng: random.Random, bad_words) -> str:
+    words = [rng.choice(CLEAN_WORDS) for _ in range(message_length(rng))]
+    words.insert(rng.randrange(len(words) + 1), obfuscate(rng, rng.choice(bad_words)))
+    return " ".join(words)[:4096]
+
+
+def generate_corpus(bad_words, count: int, seed: int):
+    rng = random.Random(seed)
+    generators = [
+        ("clean", lambda: clean_message(rng)),
+        ("dirty", lambda: dirty_message(rng, bad_words)),
+        ("obfuscated", lambda: obfuscated_message(rng, bad_words)),
+    ]
+    corpus = []
+    for i in range(count):
+        kind, generate = generators[i % len(generators)]
+        corpus.append((kind, generate()))
+    return corpus
+
+
+def reference_verdicts(bad_words, corpus):
+    patterns = {
+        mode: [re.compile(word_pattern(word, mode)) for word in bad_words]
+        for mode in (False, True)
+    }
+    verdicts = []
+    for _, text in corpus:
+        clean_text = text.lower()
+        verdicts.append({
+            mode: any(pattern.search(clean_text) for pattern in patterns[mode])
+            for mode in (False, True)
+        })
+    return verdicts
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_benchmark(bot: Karadevfacekid, corpus, total_check_mode: bool, repeat: int):
+    bot.total_check_mode = total_check_mode
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for _, text in corpus:
+            t0 = time.perf_counter_ns()
+            bot.contains_bad_words(text)
+            latencies.append(time.perf_counter_ns() - t0)
+    elapsed = time.perf_counter() - started
+    return {
+        "mode": "total" if total_check_mode else "normal",
+        "messages": len(latencies),
+        "msgs_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_us": percentile(latencies, 0.50) / 1000,
+        "p99_us": percentile(latencies, 0.99) / 1000,
+        "mean_us": statistics.fmean(latencies) / 1000,
+    }
+
+
+def golden_records(corpus, verdicts):
+    for i, ((kind, text), verdict) in enumerate(zip(corpus, verdicts)):
+        yield {
+            "id": i,
+            "kind": kind,
+            "sha1": hashlib.sha1(text.encode("utf-8")).hexdigest(),
+            "normal": verdict[False],
+            "total": verdict[True],
+        }
+
+
+def write_golden(bot: Karadevfacekid, path: str):
+    corpus = generate_corpus(bot.BAD_WORDS, GOLDEN_COUNT, GOLDEN_SEED)
+    verdicts = reference_verdicts(bot.BAD_WORDS, corpus)
+    with open(path, "w", encoding="utf-8") as f:
+        for record in golden_records(corpus, verdicts):
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(f"💾 Записано {len(corpus)} эталонных вердиктов в {path}")
+
+
+def check_golden(bot: Karadevfacekid, path: str) -> int:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            golden = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        print(f"⚠️ Файл {path} не найден, запустите с --write-golden")
+        return 0
+
+    corpus = generate_corpus(bot.BAD_WORDS, len(golden), GOLDEN_SEED)
+    mismatches = 0
+    for record, (kind, text) in zip(golden, corpus):
+        if record["sha1"] != hashlib.sha1(text.encode("utf-8")).hexdigest():
+            print(f"⚠️ Корпус изменился (сообщение #{record['id']}), перегенерируйте эталон")
+            return 1
+        for mode, key in ((False, "normal"), (True, "total")):
+            bot.total_check_mode = mode
+            verdict = bot.contains_bad_words(text)
+            if verdict != record[key]:
+                mismatches += 1
+                print(f"❌ #{record['id']} [{kind}/{key}] ожидалось {record[key]}, получено {verdict}: {text[:80]!r}")
+    status = "✅" if not mismatches else "❌"
+    print(f"{status} Эталонные вердикты: {len(golden) * 2 - mismatches}/{len(golden) * 2} совпадают")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк проверки сообщений на маты")
+    parser.add_argument("--bad-words", default="badwords.txt")
+    parser.add_argument("--count", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--golden", default=GOLDEN_FILE)
+    parser.add_argument("--write-golden", action="store_true")
+    args = parser.parse_args()
+
+    bot = Karadevfacekid(token="", bad_words_file=args.bad_words)
+    if args.write_golden:
+        write_golden(bot, args.golden)
+        return
+
+    mismatches = check_golden(bot, args.golden)
+
+    corpus = generate_corpus(bot.BAD_WORDS, args.count, args.seed)
+    lengths = [len(text) for _, text in corpus]
+    print(f"📨 Сообщений: {len(corpus)}, длина p50={percentile(lengths, 0.5)} p99={percentile(lengths, 0.99)} max={max(lengths)}")
+    for mode in (False, True):
+        result = run_benchmark(bot, corpus, mode, args.repeat)
+        print(
+            f"⏱️ {result['mode']:>6}: {result['msgs_per_sec']:10.0f} сообщ/с, "
+            f"p50={result['p50_us']:.1f} мкс, p99={result['p99_us']:.1f} мкс, среднее={result['mean_us']:.1f} мкс"
+        )
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
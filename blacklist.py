@@ -0,0 +1,89 @@
+def normalize_username(username: str) -> str:
+    return username.replace("@", "").strip().lower()
+
+
+class SuspiciousUsers:
+    def __init__(self):
+        self._names = {}
+        self._ids = {}
+        self._name_ids = {}
+        self.changes = []
+
+    def add_username(self, username: str, date_added: str):
+        name = normalize_username(username)
+        self._names[name] = date_added
+        self.changes.append(("put", name, None, date_added))
+
+    def add_id(self, user_id: int, date_added: str, username: str = None):
+        self._ids[user_id] = date_added
+        name = None
+        if username:
+            name = normalize_username(username)
+            self._names[name] = date_added
+            self._name_ids[name] = user_id
+        self.changes.append(("put", name, user_id, date_added))
+
+    def remove(self, target: str) -> bool:
+        target = normalize_username(target)
+        if target.isdigit():
+            user_id = int(target)
+            if user_id not in self._ids:
+                return False
+            del self._ids[user_id]
+            for name, name_id in list(self._name_ids.items()):
+                if name_id == user_id:
+                    del self._name_ids[name]
+                    self._names.pop(name, None)
+            self.changes.append(("delete", None, user_id))
+            return True
+
+        if target not in self._names:
+            return False
+        del self._names[target]
+        user_id = self._name_ids.pop(target, None)
+        if user_id is not None:
+            self._ids.pop(user_id, None)
+        self.changes.append(("delete", target, user_id))
+        return True
+
+    def clear(self):
+        self._names.clear()
+        self._ids.clear()
+        self._name_ids.clear()
+        self.changes.append(("clear",))
+
+    def matches(self, user) -> bool:
+        if user.id in self._ids:
+            return True
+        if not user.username:
+            return False
+        name = normalize_username(user.username)
+        date_added = self._names.get(name)
+        if date_added is None:
+            return False
+        self._ids[user.id] = date_added
+        self._name_ids[name] = user.id
+        self.changes.append(("put", name, user.id, date_added))
+        return True
+
+    def items(self):
+        for name, date_added in self._names.items():
+            yield f"@{name}", date_added
+        named_ids = set(self._name_ids.values())
+        for user_id, date_added in self._ids.items():
+            if user_id not in named_ids:
+                yield f"id {user_id}", date_added
+
+    def load(self, rows):
+        for name, user_id, date_added in rows:
+            if user_id is None:
+                self.add_username(name, date_added)
+            else:
+                self.add_id(user_id, date_added, name)
+        self.changes.clear()
+
+    def __contains__(self, username: str) -> bool:
+        return normalize_username(username) in self._names
+
+    def __len__(self):
+        return sum(1 for _ in self.items())
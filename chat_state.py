@@ -0,0 +1,38 @@
+from blacklist import SuspiciousUsers
+from leaderboard import ChatAggregates
+
+
+class ChatState:
+    def __init__(self, chat_id: int, is_enabled: bool = True, total_check_mode: bool = False, warning_limit: int = 5):
+        self.chat_id = chat_id
+        self.is_enabled = is_enabled
+        self.total_check_mode = total_check_mode
+        self.warning_limit = warning_limit
+
+        self.message_count = {}
+        self.warning_count = {}
+        self.violations = {}
+        self.suspicious_users = SuspiciousUsers()
+        self.aggregates = ChatAggregates()
+
+        self.settings_changes = {}
+
+    def configure(self, is_enabled: bool = None, total_check_mode: bool = None, warning_limit: int = None):
+        if is_enabled is not None:
+            self.is_enabled = self.settings_changes["is_enabled"] = is_enabled
+        if total_check_mode is not None:
+            self.total_check_mode = self.settings_changes["total_check_mode"] = total_check_mode
+        if warning_limit is not None:
+            self.warning_limit = self.settings_changes["warning_limit"] = warning_limit
+
+    def settings(self):
+        return self.is_enabled, self.total_check_mode, self.warning_limit
+
+    def forget_user(self, username: str):
+        self.message_count.pop(username, None)
+        self.warning_count.pop(username, None)
+        self.violations.pop(username, None)
+
+    def clear_violations(self):
+        self.violations = {}
+        self.aggregates.clear()
@@ -0,0 +1,88 @@
+import asyncio
+import os
+
+from matcher import BadWordsMatcher
+
+MAX_LAYERS = 4
+
+
+def read_words(path: str):
+    with open(path, "r", encoding="utf-8") as file:
+        return [line.strip().lower() for line in file if line.strip()]
+
+
+class BadWordsDictionary:
+    def __init__(self, path: str, poll_interval: float = 2.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.version = 0
+        self._stamp = self._file_stamp()
+        try:
+            words = read_words(path)
+        except Exception as e:
+            print(f"🚨 Ошибка: {e}")
+            words = []
+        self.words = words
+        self.matcher = BadWordsMatcher(words)
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def __len__(self):
+        return len(self.matcher)
+
+    def start(self):
+        if self._task is None and self.poll_interval:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def reload(self):
+        async with self._lock:
+            self._stamp = self._file_stamp()
+            try:
+                words = await asyncio.to_thread(read_words, self.path)
+            except Exception as e:
+                print(f"🚨 Ошибка чтения {self.path}: {e}")
+                return None
+
+            current = self.matcher
+            wanted = tuple(dict.fromkeys(words))
+            known = set(current.words)
+            added = [word for word in wanted if word not in known]
+            removed = known.difference(wanted)
+            if not added and not removed:
+                self.words = words
+                return 0, 0
+
+            if removed or current.layers >= MAX_LAYERS:
+                matcher = await asyncio.to_thread(BadWordsMatcher, wanted)
+            else:
+                matcher = await asyncio.to_thread(BadWordsMatcher, added, current)
+            self.words, self.matcher = words, matcher
+            self.version += 1
+            print(f"♻️ Словарь обновлён: +{len(added)} −{len(removed)}, всего {len(matcher)}")
+            return len(added), len(removed)
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if self._file_stamp() != self._stamp:
+                try:
+                    await self.reload()
+                except Exception as e:
+                    print(f"🚨 Ошибка перезагрузки словаря: {e}")
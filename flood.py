@@ -0,0 +1,40 @@
+from collections import OrderedDict, deque
+
+
+class FloodDetector:
+    def __init__(self, limit: int = 8, window: float = 10.0, sweep_every: int = 1000):
+        self.limit = limit
+        self.window = window
+        self.sweep_every = sweep_every
+        self.triggered = 0
+        self._hits = OrderedDict()
+        self._calls = 0
+
+    def __len__(self):
+        return len(self._hits)
+
+    def hit(self, key, now: float) -> bool:
+        self._calls += 1
+        if self._calls % self.sweep_every == 0:
+            self.sweep(now)
+
+        timestamps = self._hits.get(key)
+        if timestamps is None:
+            timestamps = self._hits[key] = deque()
+        else:
+            self._hits.move_to_end(key)
+        timestamps.append(now)
+        while timestamps[0] <= now - self.window:
+            timestamps.popleft()
+        if len(timestamps) > self.limit:
+            timestamps.clear()
+            self.triggered += 1
+            return True
+        return False
+
+    def sweep(self, now: float):
+        while self._hits:
+            key, timestamps = next(iter(self._hits.items()))
+            if timestamps and timestamps[-1] > now - self.window:
+                break
+            del self._hits[key]
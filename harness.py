@@ -0,0 +1,234 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+from telegram import Update
+from telegram.ext import TypeHandler
+from telegram.request import BaseRequest
+
+from benchmark import clean_message, dirty_message, obfuscated_message, percentile
+from main import Karadevfacekid
+
+STUB_TOKEN = "123456:STUB"
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Stub", "username": "stub_bot"}
+
+
+class FakeTelegramRequest(BaseRequest):
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, admin_ids=(1,), seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.admin_ids = tuple(admin_ids)
+        self.calls = []
+        self._rng = random.Random(seed)
+        self._message_id = 10 ** 6
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None, write_timeout=None,
+                         connect_timeout=None, pool_timeout=None):
+        api_method = url.rsplit("/", 1)[-1]
+        parameters = request_data.parameters if request_data else {}
+        self.calls.append((api_method, parameters))
+        if self.latency:
+            await asyncio.sleep(max(0.0, self._rng.gauss(self.latency, self.jitter)))
+        return 200, json.dumps({"ok": True, "result": self._result(api_method, parameters)}).encode()
+
+    def _result(self, api_method: str, parameters):
+        if api_method == "getMe":
+            return BOT_USER
+        if api_method in ("sendMessage", "editMessageText"):
+            self._message_id += 1
+            return {
+                "message_id": self._message_id,
+                "date": int(time.time()),
+                "chat": {"id": parameters.get("chat_id", 0), "type": "supergroup", "title": "Чат"},
+                "from": BOT_USER,
+                "text": parameters.get("text", ""),
+            }
+        if api_method == "getChatAdministrators":
+            return [
+                {"status": "creator" if i == 0 else "administrator", "is_anonymous": False,
+                 "user": {"id": admin_id, "is_bot": False, "first_name": "Admin", "username": f"admin{admin_id}"},
+                 **({} if i == 0 else {
+                     "can_be_edited": False, "can_manage_chat": True, "can_change_info": True,
+                     "can_delete_messages": True, "can_invite_users": True, "can_restrict_members": True,
+                     "can_promote_members": True, "can_manage_video_chats": True, "can_post_stories": True,
+                     "can_edit_stories": True, "can_delete_stories": True})}
+                for i, admin_id in enumerate(self.admin_ids)
+            ]
+        return True
+
+    def decisions(self):
+        return Counter(api_method for api_method, _ in self.calls)
+
+
+def message_update(update_id: int, chat_id: int, user_id: int, text: str):
+    message = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "supergroup", "title": "Чат"},
+        "from": {"id": user_id, "is_bot": False, "first_name": "User", "username": f"user{user_id}"},
+        "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": update_id, "message": message}
+
+
+def join_update(update_id: int, chat_id: int, user_id: int):
+    member = {"id": user_id, "is_bot": False, "first_name": "User", "username": f"user{user_id}"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "supergroup", "title": "Чат"},
+            "from": member,
+            "new_chat_members": [member],
+        },
+    }
+
+
+def synthetic_updates(bad_words, count: int, chats: int, users: int, seed: int):
+    rng = random.Random(seed)
+    for update_id in range(1, count + 1):
+        chat_id = -1000 - rng.randrange(chats)
+        user_id = 1000 + rng.randrange(users)
+        roll = rng.random()
+        if roll < 0.01:
+            yield join_update(update_id, chat_id, user_id)
+        elif roll < 0.02:
+            yield message_update(update_id, chat_id, 1, f"/stat @user{user_id}")
+        elif roll < 0.80:
+            yield message_update(update_id, chat_id, user_id, clean_message(rng))
+        elif roll < 0.92:
+            yield message_update(update_id, chat_id, user_id, dirty_message(rng, bad_words))
+        else:
+            yield message_update(update_id, chat_id, user_id, obfuscated_message(rng, bad_words))
+
+
+def recorded_updates(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+async def replay(bot: Karadevfacekid, request: FakeTelegramRequest, updates, rate_per_minute: float):
+    app = bot.build_application(request=request)
+    started_at = {}
+    latencies = []
+    handling = []
+    finished = asyncio.Event()
+    expected = len(updates)
+
+    async def on_start(update, context):
+        started_at[update.update_id] = (started_at[update.update_id], time.perf_counter())
+
+    async def on_finish(update, context):
+        enqueued, started = started_at.pop(update.update_id)
+        now = time.perf_counter()
+        latencies.append(now - enqueued)
+        handling.append(now - started)
+        if len(latencies) == expected:
+            finished.set()
+
+    app.add_handler(TypeHandler(Update, on_start), group=-1)
+    app.add_handler(TypeHandler(Update, on_finish), group=100)
+
+    async with app:
+        await bot.post_init(app)
+        await app.start()
+        interval = 60.0 / rate_per_minute if rate_per_minute else 0.0
+        t0 = time.perf_counter()
+        for i, data in enumerate(updates):
+            if interval:
+                delay = t0 + i * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            update = Update.de_json(data, app.bot)
+            started_at[update.update_id] = time.perf_counter()
+            await app.update_queue.put(update)
+        if expected:
+            await finished.wait()
+        elapsed = time.perf_counter() - t0
+        await app.stop()
+        await bot.post_stop(app)
+        await bot.post_shutdown(app)
+    return elapsed, latencies, handling
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Офлайн-прогон обработчиков бота без Telegram")
+    parser.add_argument("--replay", help="JSONL-файл с записанными обновлениями")
+    parser.add_argument("--record", help="сохранить сгенерированные обновления в JSONL")
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=10000, help="обновлений в минуту, 0 — без ограничения")
+    parser.add_argument("--latency", type=float, default=0.05, help="имитируемая задержка API, с")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--total-check", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="karadev-harness-")
+    bot = Karadevfacekid(
+        token=STUB_TOKEN,
+        log_file=os.path.join(workdir, "violations.log"),
+        db_file=os.path.join(workdir, "state.db"),
+        concurrent_updates=args.concurrency,
+        metrics_port=None,
+    )
+    bot.total_check_mode = args.total_check
+    request = FakeTelegramRequest(latency=args.latency, seed=args.seed)
+
+    if args.replay:
+        updates = list(recorded_updates(args.replay))
+    else:
+        updates = list(synthetic_updates(bot.BAD_WORDS, args.count, args.chats, args.users, args.seed))
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as f:
+            for data in updates:
+                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+
+    elapsed, latencies, handling = asyncio.run(replay(bot, request, updates, args.rate))
+
+    print(f"📨 Обновлений: {len(updates)} за {elapsed:.2f} с — {len(updates) / elapsed:.0f} обн/с")
+    if latencies:
+        print(
+            "⏱️ Задержка (очередь + обработка): "
+            f"p50={percentile(latencies, 0.5) * 1000:.1f} мс, "
+            f"p95={percentile(latencies, 0.95) * 1000:.1f} мс, "
+            f"p99={percentile(latencies, 0.99) * 1000:.1f} мс"
+        )
+        print(
+            "⏱️ Время в обработчиках: "
+            f"p50={percentile(handling, 0.5) * 1000:.1f} мс, "
+            f"p99={percentile(handling, 0.99) * 1000:.1f} мс"
+        )
+    decisions = request.decisions()
+    violations = sum(sum(chat.violations.values()) for chat in bot.chats.values())
+    print(f"⚖️ Нарушений: {violations}, чатов: {len(bot.chats)}")
+    print("📡 Вызовы API: " + ", ".join(f"{name}={count}" for name, count in sorted(decisions.items())))
+    print(
+        f"📤 Исходящие: отправлено {bot.outbound.sent}, объединено {bot.outbound.merged}, "
+        f"потеряно {bot.outbound.dropped}"
+    )
+
+
+if __name__ == "__main__":
+    main()
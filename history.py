@@ -0,0 +1,57 @@
+import sys
+from collections import OrderedDict, deque
+from datetime import datetime
+
+
+def format_timestamp(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class IdleEvictor:
+    __slots__ = ("max_users", "idle_seconds", "_last_seen")
+
+    def __init__(self, max_users: int = 50000, idle_seconds: float = 7 * 24 * 60 * 60):
+        self.max_users = max_users
+        self.idle_seconds = idle_seconds
+        self._last_seen = OrderedDict()
+
+    def __contains__(self, key) -> bool:
+        return key in self._last_seen
+
+    def __len__(self):
+        return len(self._last_seen)
+
+    def touch(self, key, now: float):
+        self._last_seen[key] = now
+        self._last_seen.move_to_end(key)
+
+    def evict(self, now: float):
+        evicted = []
+        while self._last_seen:
+            key, last_seen = next(iter(self._last_seen.items()))
+            if len(self._last_seen) <= self.max_users and now - last_seen < self.idle_seconds:
+                break
+            del self._last_seen[key]
+            evicted.append(key)
+        return evicted
+
+    def clear(self):
+        self._last_seen.clear()
+
+
+def deep_sizeof(obj, seen=None) -> int:
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_sizeof(getattr(obj, slot), seen) for slot in obj.__slots__ if hasattr(obj, slot))
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    return size
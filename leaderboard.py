@@ -0,0 +1,128 @@
+import heapq
+from collections import deque
+
+
+class Leaderboard:
+    __slots__ = ("_scores", "_heap")
+
+    def __init__(self):
+        self._scores = {}
+        self._heap = []
+
+    def __len__(self):
+        return len(self._scores)
+
+    def update(self, key, score):
+        if self._scores.get(key) == score:
+            return
+        self._scores[key] = score
+        heapq.heappush(self._heap, (-score, key))
+        if len(self._heap) > 2 * len(self._scores) + 64:
+            self._compact()
+
+    def load(self, scores):
+        self._scores = dict(scores)
+        self._compact()
+
+    def clear(self):
+        self._scores.clear()
+        self._heap.clear()
+
+    def top(self, n: int):
+        result = []
+        valid = []
+        while self._heap and len(result) < n:
+            entry = heapq.heappop(self._heap)
+            neg_score, key = entry
+            if self._scores.get(key) != -neg_score or (valid and valid[-1] == entry):
+                continue
+            valid.append(entry)
+            result.append((key, -neg_score))
+        for entry in valid:
+            heapq.heappush(self._heap, entry)
+        return result
+
+    def _compact(self):
+        self._heap = [(-score, key) for key, score in self._scores.items()]
+        heapq.heapify(self._heap)
+
+
+class TimeBuckets:
+    __slots__ = ("width", "size", "_buckets")
+
+    def __init__(self, width: float, size: int):
+        self.width = width
+        self.size = size
+        self._buckets = deque()
+
+    def add(self, timestamp: float, count: int = 1):
+        index = int(timestamp // self.width)
+        if self._buckets and self._buckets[-1][0] == index:
+            self._buckets[-1][1] += count
+        elif not self._buckets or self._buckets[-1][0] < index:
+            self._buckets.append([index, count])
+        else:
+            for bucket in self._buckets:
+                if bucket[0] == index:
+                    bucket[1] += count
+                    break
+            else:
+                self._buckets.append([index, count])
+                self._buckets = deque(sorted(self._buckets))
+        self._trim(index)
+
+    def total(self, now: float, span: float = None) -> int:
+        index = int(now // self.width)
+        self._trim(index)
+        first = index - (self.size if span is None else max(1, int(span // self.width))) + 1
+        return sum(count for bucket_index, count in self._buckets if bucket_index >= first)
+
+    def clear(self):
+        self._buckets.clear()
+
+    def _trim(self, index: int):
+        while self._buckets and self._buckets[0][0] <= index - self.size:
+            self._buckets.popleft()
+
+
+class ChatAggregates:
+    def __init__(self):
+        self.violators = Leaderboard()
+        self.worst_reputation = Leaderboard()
+        self.per_minute = TimeBuckets(60, 60)
+        self.per_hour = TimeBuckets(60 * 60, 7 * 24)
+
+    def load(self, counters, timestamps):
+        self.violators.load((username, violations) for username, _, violations in counters if violations)
+        self.worst_reputation.load(
+            (username, bad_ratio(messages, violations)) for username, messages, violations in counters if violations
+        )
+        for timestamp, count in timestamps:
+            self.add_violations(timestamp, count)
+
+    def record(self, username: str, messages: int, violations: int):
+        if username is None or not violations:
+            return
+        self.violators.update(username, violations)
+        self.worst_reputation.update(username, bad_ratio(messages, violations))
+
+    def add_violations(self, timestamp: float, count: int = 1):
+        self.per_minute.add(timestamp, count)
+        self.per_hour.add(timestamp, count)
+
+    def violation_counts(self, now: float):
+        return (
+            self.per_minute.total(now),
+            self.per_hour.total(now, 24 * 60 * 60),
+            self.per_hour.total(now),
+        )
+
+    def clear(self):
+        self.violators.clear()
+        self.worst_reputation.clear()
+        self.per_minute.clear()
+        self.per_hour.clear()
+
+
+def bad_ratio(messages: int, violations: int) -> float:
+    return min(1.0, violations / max(messages, 1))
@@ -1,24 +1,50 @@
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, error
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ChatMember, ChatPermissions, error
 from telegram.ext import (
     ApplicationBuilder,
     CommandHandler,
     MessageHandler,
     ContextTypes,
     filters,
-    CallbackQueryHandler
+    CallbackQueryHandler,
+    ChatMemberHandler
 )
+from telegram.request import HTTPXRequest
 from datetime import datetime, timedelta
-import re
+import asyncio
 import random
-import os
+import signal
+import time
+
+from admin_cache import AdminCache
+from chat_state import ChatState
+from history import IdleEvictor, deep_sizeof, format_timestamp
+from dictionary import BadWordsDictionary
+from flood import FloodDetector
+from metrics import InstrumentedRequest, MetricsRegistry, MetricsServer
+from normalizer import TextNormalizer
+from outbound import OutboundScheduler
+from scanner import LongMessageScanner
+from storage import StateStore
+from update_processor import PerUserUpdateProcessor
+from verdict_cache import MISSING, VerdictCache
+from violation_log import ViolationLogWriter
+from webhook import WebhookServer
 
 
 class Karadevfacekid:
-    def __init__(self, token: str, bad_words_file: str = "badwords.txt", log_file: str = "violations.log"):
+    def __init__(self, token: str, bad_words_file: str = "badwords.txt", log_file: str = "violations.log",
+                 admin_cache_ttl: int = 300, db_file: str = "state.db", concurrent_updates: int = 32,
+                 metrics_port: int = 9108, bad_words_poll_interval: float = 2.0,
+                 long_message_threshold: int = 1024, scan_time_budget: float = 0.5,
+                 scan_timeout_action: str = "delete", verdict_cache_size: int = 10000,
+                 flood_limit: int = 8, flood_window: float = 10.0, homoglyphs_file: str = "homoglyphs.txt"):
         self.TOKEN = token
+        self.CONCURRENT_UPDATES = concurrent_updates
+        self.METRICS_PORT = metrics_port
         self.BAD_WORDS_FILE = bad_words_file
         self.LOG_FILE = log_file
-        self.BAD_WORDS = self.load_bad_words()
+        self.dictionary = BadWordsDictionary(self.BAD_WORDS_FILE, poll_interval=bad_words_poll_interval)
+        self.normalizer = TextNormalizer(homoglyphs_file)
         self.GREETINGS = [
             "Добро пожаловать, {username}! 🎉",
             "Привет, {username}! Рады видеть тебя в нашей группе! 😊",
@@ -34,69 +60,140 @@ class Karadevfacekid:
         self.BAN_DURATIONS = {
             "suspicious_user": 3,
             "exceed_warning_limit": 1,
+            "flood": 1,
         }
+        self.MUTE_REASONS = {"flood"}
         self.BAN_DURATION = 1
-        self.violations = {}
-        self.violation_messages = {}
-        self.suspicious_users = {}
-        self.message_count = {}
-        self.warning_count = {}
+        self.chats = {}
+        self._chat_loads = {}
 
         self.WARNING_LIMIT = 5
 
         self.is_enabled = True
         self.total_check_mode = False
+        self.SCAN_TIMEOUT_ACTIONS = ("allow", "delete", "violation")
+        if scan_timeout_action not in self.SCAN_TIMEOUT_ACTIONS:
+            raise ValueError(f"scan_timeout_action должен быть одним из {self.SCAN_TIMEOUT_ACTIONS}")
+        self.SCAN_TIMEOUT_ACTION = scan_timeout_action
+
+        self.admin_cache = AdminCache(ttl=admin_cache_ttl)
+        self.log_writer = ViolationLogWriter(self.LOG_FILE)
+        self.outbound = OutboundScheduler()
+        self.scanner = LongMessageScanner(threshold=long_message_threshold, time_budget=scan_time_budget)
+        self.verdict_cache = VerdictCache(max_size=verdict_cache_size)
+        self.flood_detector = FloodDetector(limit=flood_limit, window=flood_window)
+        self.store = StateStore(db_file)
+        self.store.on_flush = self._sync_chat_states
+        self.active_users = IdleEvictor()
+
+        self.metrics = MetricsRegistry()
+        self.metrics_server = None
+        self._matcher_seconds = {
+            mode: self.metrics.histogram(
+                "bot_matcher_seconds", "Время проверки текста на маты", mode="total" if mode else "normal")
+            for mode in (False, True)
+        }
+        self._offloaded_seconds = self.metrics.histogram(
+            "bot_offloaded_scan_seconds", "Время проверки длинных сообщений в пуле процессов")
+        self._register_state_metrics()
 
 
-    def load_bad_words(self):
-        try:
-            with open(self.BAD_WORDS_FILE, "r", encoding="utf-8") as file:
-                words = [line.strip().lower() for line in file if line.strip()]
-                return words
-        except Exception as e:
-            print(f"🚨 Ошибка: {e}")
-            return []
+    @property
+    def BAD_WORDS(self):
+        return self.dictionary.words
+
+    def contains_bad_words(self, text: str, total_check_mode: bool = None) -> bool:
+        if total_check_mode is None:
+            total_check_mode = self.total_check_mode
+        return self._search(self.normalizer.normalize(text), total_check_mode)
 
-    def contains_bad_words(self, text: str) -> bool:
+    def _search(self, text: str, total_check_mode: bool) -> bool:
+        started = time.perf_counter()
         try:
-            clean_text = text.lower()
-
-            for word in self.BAD_WORDS:
-                if self.total_check_mode:
-                    pattern = ""
-                    for char in word:
-                        if char.isalpha():
-                            pattern += f"{char}+[^а-я]*"
-                        else:
-                            pattern += re.escape(char)
-                    pattern = pattern.rstrip("[^а-я]*")
-                else:
-                    pattern = re.sub(r"(\w)", r"\1+", word)
-                if re.search(pattern, clean_text):
-                    return True
-            return False
+            return self.dictionary.matcher.search(text, total_check_mode)
         except Exception as e:
             print(f"🚨 Ошибка проверки: {e}")
             return False
-
+        finally:
+            self._matcher_seconds[total_check_mode].observe(time.perf_counter() - started)
+
+    async def check_text(self, text: str, total_check_mode: bool = None):
+        if total_check_mode is None:
+            total_check_mode = self.total_check_mode
+        text = self.normalizer.normalize(text)
+        version = self.dictionary.version
+        key = self.verdict_cache.key(text, total_check_mode)
+        verdict = self.verdict_cache.get(version, key)
+        if verdict is not MISSING:
+            return verdict
+
+        if not self.scanner.should_offload(text):
+            verdict = self._search(text, total_check_mode)
+        else:
+            started = time.perf_counter()
+            try:
+                verdict = await self.scanner.scan(self.dictionary, text, total_check_mode)
+            except asyncio.TimeoutError:
+                return None
+            except Exception as e:
+                print(f"🚨 Ошибка проверки длинного сообщения: {e}")
+                verdict = self._search(text, total_check_mode)
+            finally:
+                self._offloaded_seconds.observe(time.perf_counter() - started)
+        self.verdict_cache.put(version, key, verdict)
+        return verdict
+
+
+    async def get_chat_state(self, chat_id: int) -> ChatState:
+        state = self.chats.get(chat_id)
+        if state is not None:
+            return state
+        task = self._chat_loads.get(chat_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load_chat_state(chat_id))
+            self._chat_loads[chat_id] = task
+        return await asyncio.shield(task)
+
+    async def _load_chat_state(self, chat_id: int) -> ChatState:
+        state = ChatState(chat_id, self.is_enabled, self.total_check_mode, self.WARNING_LIMIT)
+        try:
+            settings, blacklist = await self.store.load_chat(chat_id)
+            if settings:
+                state.is_enabled = bool(settings[0])
+                state.total_check_mode = bool(settings[1])
+                state.warning_limit = settings[2]
+            state.suspicious_users.load(blacklist)
+            since = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d %H:%M:%S")
+            counters, minutes = await self.store.load_aggregates(chat_id, since)
+            state.aggregates.load(
+                counters,
+                ((datetime.strptime(minute, "%Y-%m-%d %H:%M").timestamp(), count) for minute, count in minutes),
+            )
+        except Exception as e:
+            print(f"🚨 Ошибка загрузки настроек чата: {e}")
+        finally:
+            self._chat_loads.pop(chat_id, None)
+        self.chats[chat_id] = state
+        return state
 
     async def total_check_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         if not await self.is_admin(update, context):
             await update.message.reply_text("⛔ У вас нет прав для выполнения этой команды.")
             return
         try:
+            chat = await self.get_chat_state(update.effective_chat.id)
             action = context.args[0].lower() if context.args else None
 
             if action == "on":
-                self.total_check_mode = True
+                chat.configure(total_check_mode=True)
                 await update.message.reply_text(
                     "✅ Режим тотальной проверки включён. Бот будет реагировать на слова с пробелами, дефисами и другими символами.")
             elif action == "off":
-                self.total_check_mode = False
+                chat.configure(total_check_mode=False)
                 await update.message.reply_text(
                     "⛔ Режим тотальной проверки выключен. Бот будет реагировать только на слова без пробелов и дефисов.")
             elif action == "status":
-                status = "включён.\n 🤝💪Да здравствует Северная Корея!💪🤝\n 👋 Привет Ким Чен Ын! ❤" if self.total_check_mode else "выключен. \n Спите спокойно."
+                status = "включён.\n 🤝💪Да здравствует Северная Корея!💪🤝\n 👋 Привет Ким Чен Ын! ❤" if chat.total_check_mode else "выключен. \n Спите спокойно."
                 await update.message.reply_text(f"📊 Режим тотальной проверки: {status}")
             else:
                 await update.message.reply_text(
@@ -105,128 +202,238 @@ class Karadevfacekid:
             print(f"🚨 Ошибка: {e}")
             await update.message.reply_text("⚠️ Произошла ошибка при выполнении команды.")
 
-    def log_violation(self, username: str, text: str):
-        try:
-            with open(self.LOG_FILE, "a", encoding="utf-8") as f:
-                f.write(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] @{username}: {text}\n")
-        except Exception as e:
-            print(f"⚠️ Ошибка записи в лог: {e}")
+    def log_violation(self, chat_id: int, username: str, text: str):
+        self.log_writer.write(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] [{chat_id}] @{username}: {text}\n")
 
 
     async def message_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        if not self.is_enabled:
+        if not update.message or not update.message.text:
             return
 
-        if not update.message or not update.message.text:
+        chat_id = update.message.chat_id
+        chat = await self.get_chat_state(chat_id)
+        if not chat.is_enabled:
             return
 
         user = update.message.from_user
 
-        if user.username and user.username.lower() in [u.lower() for u in self.suspicious_users]:
+        if chat.suspicious_users.matches(user):
             try:
-                await update.message.delete()
-                await self._ban_user(context, update.message.chat_id, user)
+                await self.outbound.call(update.message.delete, chat_id)
+                await self._ban_user(context, chat_id, user)
                 return
-            except error.BadRequest as e:
+            except error.TelegramError as e:
                 print(f"⚠️ Ошибка удаления сообщения: {e}")
         user = update.message.from_user
         text = update.message.text
 
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        now = time.time()
+        if (chat_id, user.username) not in self.active_users:
+            await self._load_user(chat, user.username)
+        self._touch_user(chat_id, user.username, now)
 
-        self.message_count[user.username] = self.message_count.get(user.username, 0) + 1
-        if self.contains_bad_words(text):
+        chat.message_count[user.username] = chat.message_count.get(user.username, 0) + 1
+        self.store.increment(chat_id, user.username, messages=1)
+        chat.aggregates.record(user.username, chat.message_count[user.username], chat.violations.get(user.username, 0))
+        if self.flood_detector.hit((chat_id, user.id), now):
+            try:
+                await self._ban_user(context, chat_id, user, "flood")
+                self.outbound.send_message(
+                    context.bot, chat_id,
+                    f"🔇 Пользователь @{user.username} лишён права писать на {self.BAN_DURATIONS['flood']} дн. за флуд.",
+                    update.message.message_id)
+            except error.TelegramError as e:
+                print(f"⚠️ Не удалось ограничить флудера: {e}")
+            return
+        verdict = await self.check_text(text, chat.total_check_mode)
+        if verdict is None:
+            print(f"⚠️ Проверка сообщения @{user.username} ({len(text)} симв.) не уложилась в лимит времени")
+            if self.SCAN_TIMEOUT_ACTION == "delete":
+                try:
+                    await self.outbound.call(update.message.delete, chat_id)
+                except error.TelegramError as e:
+                    print(f"⚠️ Ошибка удаления сообщения: {e}")
+                return
+            verdict = self.SCAN_TIMEOUT_ACTION == "violation"
+        if verdict:
             try:
                 warning = random.choice(self.WARNINGS).format(username=user.username)
-                await update.message.reply_text(warning)
 
-                self.log_violation(user.username, text)
+                self.log_violation(chat_id, user.username, text)
 
-                self.warning_count[user.username] = self.warning_count.get(user.username, 0) + 1
+                chat.warning_count[user.username] = chat.warning_count.get(user.username, 0) + 1
+                self.store.increment(chat_id, user.username, warnings=1)
 
-                if self.warning_count[user.username] >= self.WARNING_LIMIT:
-                    print(self.warning_count[user.username])
-                    await context.bot.ban_chat_member(
-                        chat_id=update.message.chat_id,
-                        user_id=user.id,
-                        until_date=datetime.now() + timedelta(days=self.BAN_DURATIONS['exceed_warning_limit']))
-                    await update.message.reply_text(
-                        f"⛔ Пользователь @{user.username} был забанен на {self.BAN_DURATIONS['exceed_warning_limit']} дня за превышение лимита предупреждений."
+                if chat.warning_count[user.username] >= chat.warning_limit:
+                    print(chat.warning_count[user.username])
+                    await self._ban_user(context, chat_id, user, "exceed_warning_limit")
+                    self.store.increment(chat_id, user.username, warnings=-chat.warning_count[user.username])
+                    chat.warning_count[user.username] = 0
+                    warning += (
+                        f"\n⛔ Пользователь @{user.username} был забанен на {self.BAN_DURATIONS['exceed_warning_limit']} дня за превышение лимита предупреждений."
                     )
-                    self.warning_count[user.username] = 0
                 else:
-                    warnings_left = self.WARNING_LIMIT - self.warning_count[user.username]
-                    await update.message.reply_text(
-                        f"⚠️ @{user.username}, у вас {self.warning_count[user.username]}/{self.WARNING_LIMIT} предупреждений. "
+                    warnings_left = chat.warning_limit - chat.warning_count[user.username]
+                    warning += (
+                        f"\n⚠️ @{user.username}, у вас {chat.warning_count[user.username]}/{chat.warning_limit} предупреждений. "
                         f"Осталось {warnings_left} предупреждений до бана."
                     )
+                self.outbound.send_message(context.bot, chat_id, warning, update.message.message_id)
 
-                if user.username in self.violations:
-                    self.violations[user.username] += 1
-                    self.violation_messages[user.username].append((timestamp, text))
+                if user.username in chat.violations:
+                    chat.violations[user.username] += 1
                 else:
-                    self.violations[user.username] = 1
-                    self.violation_messages[user.username] = [(timestamp, text)]
+                    chat.violations[user.username] = 1
+                chat.aggregates.record(user.username, chat.message_count[user.username], chat.violations[user.username])
+                chat.aggregates.add_violations(now)
+                self.store.increment(chat_id, user.username, violations=1)
+                self.store.add_violation(chat_id, user.username, format_timestamp(int(now)), text)
             except Exception as e:
                 print(f"🚨 Ошибка при обработке сообщения: {e}")
 
     async def greet_new_members(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        if not self.is_enabled:
+        chat = await self.get_chat_state(update.message.chat_id)
+        if not chat.is_enabled:
             return
 
         for member in update.message.new_chat_members:
-            if member.username in self.suspicious_users:
+            if chat.suspicious_users.matches(member):
                 try:
-                    await context.bot.ban_chat_member(
-                        chat_id=update.message.chat_id,
-                        user_id=member.id,
-                        until_date=datetime.now() + timedelta(days=self.BAN_DURATIONS['suspicious_user']))
-                    await update.message.reply_text(
+                    await self._ban_user(context, update.message.chat_id, member)
+                    self.outbound.send_message(
+                        context.bot, update.message.chat_id,
                         f"⛔ Пользователь @{member.username} был забанен на {self.BAN_DURATIONS['suspicious_user']}, так как находится в списке подозрительных."
                     )
                 except Exception as e:
                     print(f"🚨 Ошибка при бане пользователя: {e}")
-                    await update.message.reply_text("⚠️ Не удалось забанить пользователя.")
+                    self.outbound.send_message(context.bot, update.message.chat_id, "⚠️ Не удалось забанить пользователя.")
             else:
                 greeting = random.choice(self.GREETINGS).format(username=member.username)
-                await update.message.reply_text(greeting)
+                self.outbound.send_message(context.bot, update.message.chat_id, greeting, update.message.message_id)
 
 
+    async def _load_user(self, chat: ChatState, username: str):
+        if username is None:
+            return
+        try:
+            messages, violations, warnings = await self.store.load_user(chat.chat_id, username)
+        except Exception as e:
+            print(f"🚨 Ошибка загрузки пользователя: {e}")
+            return
+        if messages:
+            chat.message_count[username] = messages
+        if violations:
+            chat.violations[username] = violations
+        if warnings:
+            chat.warning_count[username] = warnings
+
+    def _touch_user(self, chat_id: int, username: str, now: float):
+        self.active_users.touch((chat_id, username), now)
+        for evicted_chat_id, evicted_username in self.active_users.evict(now):
+            chat = self.chats.get(evicted_chat_id)
+            if chat is not None:
+                chat.forget_user(evicted_username)
+
+    async def _ban_user(self, context: ContextTypes.DEFAULT_TYPE, chat_id: int, user, reason: str = "suspicious_user"):
+        until_date = datetime.now() + timedelta(days=self.BAN_DURATIONS[reason])
+        if reason in self.MUTE_REASONS:
+            await self.outbound.call(
+                lambda: context.bot.restrict_chat_member(
+                    chat_id=chat_id, user_id=user.id, permissions=ChatPermissions.no_permissions(),
+                    until_date=until_date),
+                chat_id)
+            return
+        await self.outbound.call(
+            lambda: context.bot.ban_chat_member(chat_id=chat_id, user_id=user.id, until_date=until_date),
+            chat_id)
+
     async def reload_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        self.BAD_WORDS = self.load_bad_words()
-        await update.message.reply_text(f"♻️ Обновлено! Запрещенных слов: {len(self.BAD_WORDS)}")
+        if not await self.is_admin(update, context):
+            await update.message.reply_text("⛔ У вас нет прав для выполнения этой команды.")
+            return
+        result = await self.dictionary.reload()
+        if result is None:
+            await update.message.reply_text("🚨 Не удалось прочитать список слов, оставлен прежний.")
+            return
+        added, removed = result
+        await update.message.reply_text(
+            f"♻️ Обновлено! Запрещенных слов: {len(self.dictionary)} (+{added}, −{removed})")
 
     async def history_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         try:
             parts = update.message.text.split()
             username = parts[1].replace("@", "")
-            limit = int(parts[2]) if len(parts) > 2 else 5
-
-            if username in self.violations:
-                count = self.violations[username]
-                messages = self.violation_messages.get(username, [])
-                last_messages = messages[-limit:]
-
-                response = f"📊 @{username} использовал(а) маты {count} раз(а).\n"
-                response += "Последние сообщения с матами:\n"
-                response += "\n".join(f"• [{timestamp}] {msg}" for timestamp, msg in last_messages)
-
-                await update.message.reply_text(response)
-            else:
-                await update.message.reply_text(f"📊 @{username} не использовал(а) маты.")
+            limit = min(int(parts[2]) if len(parts) > 2 else 5, 20)
+            if limit < 1:
+                raise ValueError
+            response, reply_markup = await self._history_page(update.message.chat_id, username, limit)
+            await update.message.reply_text(response, reply_markup=reply_markup)
         except IndexError:
             await update.message.reply_text("⚠️ Используйте команду так: /hist @username [N]")
         except ValueError:
             await update.message.reply_text("⚠️ N должно быть числом.")
 
+    async def _history_page(self, chat_id: int, username: str, limit: int, before_id: int = None,
+                            after_id: int = None):
+        counters = await self.store.user_counters(chat_id, username)
+        if not counters or not counters[1]:
+            return f"📊 @{username} не использовал(а) маты.", None
+
+        rows, has_newer, has_older = await self.store.violation_page(chat_id, username, limit, before_id, after_id)
+        response = f"📊 @{username} использовал(а) маты {counters[1]} раз(а).\n"
+        response += "Последние сообщения с матами:\n" if not has_newer else "Более ранние сообщения с матами:\n"
+        response += "\n".join(f"• [{timestamp}] {msg}" for _, timestamp, msg in rows)
+
+        buttons = []
+        if rows and has_newer:
+            buttons.append(InlineKeyboardButton("⬅️ Новее", callback_data=f"hist:n:{rows[-1][0]}:{limit}:{username}"))
+        if rows and has_older:
+            buttons.append(InlineKeyboardButton("Старее ➡️", callback_data=f"hist:o:{rows[0][0]}:{limit}:{username}"))
+        return response[:4096], InlineKeyboardMarkup([buttons]) if buttons else None
+
+    async def top_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        try:
+            parts = update.message.text.split()
+            limit = min(int(parts[1]) if len(parts) > 1 else 10, 50)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            await update.message.reply_text("⚠️ Используйте команду так: /top [N]")
+            return
+
+        chat = await self.get_chat_state(update.message.chat_id)
+        aggregates = chat.aggregates
+        last_hour, last_day, last_week = aggregates.violation_counts(time.time())
+
+        response = "🏆 Больше всего матов:\n"
+        violators = aggregates.violators.top(limit)
+        if violators:
+            response += "\n".join(
+                f"{place}. @{username} — {violations}" for place, (username, violations) in enumerate(violators, 1)
+            )
+        else:
+            response += "Пока никого."
+        response += "\n\n👎 Худшая репутация:\n"
+        worst = aggregates.worst_reputation.top(limit)
+        if worst:
+            response += "\n".join(
+                f"{place}. @{username} — {ratio:.0%} сообщений с матами"
+                for place, (username, ratio) in enumerate(worst, 1)
+            )
+        else:
+            response += "Пока никого."
+        response += f"\n\n📈 Нарушений за час: {last_hour}, за сутки: {last_day}, за неделю: {last_week}"
+        await update.message.reply_text(response[:4096])
+
     async def mode_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         try:
             mode = update.message.text.split()[1].lower()
+            chat = await self.get_chat_state(update.message.chat_id)
             if mode == "enable":
-                self.is_enabled = True
+                chat.configure(is_enabled=True)
                 await update.message.reply_text("✅ Бот включён. Все функции активны.")
             elif mode == "disable":
-                self.is_enabled = False
+                chat.configure(is_enabled=False)
                 await update.message.reply_text("⛔ Бот отключён. Все функции неактивны.")
             else:
                 await update.message.reply_text("⚠️ Используйте команду так: /mode enable или /mode disable")
@@ -234,7 +441,8 @@ class Karadevfacekid:
             await update.message.reply_text("⚠️ Используйте команду так: /mode enable или /mode disable")
 
     async def status_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        status = "✅ Включён" if self.is_enabled else "⛔ Отключён"
+        chat = await self.get_chat_state(update.message.chat_id)
+        status = "✅ Включён" if chat.is_enabled else "⛔ Отключён"
         await update.message.reply_text(f"Статус бота: {status}")
 
     async def set_warning_limit_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -248,7 +456,8 @@ class Karadevfacekid:
                 await update.message.reply_text("⚠️ Лимит предупреждений должен быть больше 0.")
                 return
 
-            self.WARNING_LIMIT = new_limit
+            chat = await self.get_chat_state(update.message.chat_id)
+            chat.configure(warning_limit=new_limit)
             await update.message.reply_text(f"✅ Лимит предупреждений изменён на {new_limit}.")
         except (IndexError, ValueError):
             await update.message.reply_text("⚠️ Используйте команду так: /limit <число>.")
@@ -277,22 +486,35 @@ class Karadevfacekid:
                 return
 
             action = parts[1].lower()
+            suspicious_users = (await self.get_chat_state(update.message.chat_id)).suspicious_users
 
             if action == "add":
+                date_added = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                reply = update.message.reply_to_message
+                if len(parts) < 3 and reply and reply.from_user:
+                    target = reply.from_user
+                    suspicious_users.add_id(target.id, date_added, target.username)
+                    label = f"@{target.username}" if target.username else f"id {target.id}"
+                    await update.message.reply_text(f"✅ Пользователь {label} добавлен в список подозрительных.")
+                    return
                 if len(parts) < 3:
                     await update.message.reply_text("⚠️ Используйте команду так: /enemy add @username")
                     return
                 username = parts[2].replace("@", "")
-                self.suspicious_users[username] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                if username.isdigit():
+                    suspicious_users.add_id(int(username), date_added)
+                    await update.message.reply_text(f"✅ Пользователь id {username} добавлен в список подозрительных.")
+                    return
+                suspicious_users.add_username(username, date_added)
                 await update.message.reply_text(f"✅ Пользователь @{username} добавлен в список подозрительных.")
 
             elif action == "list":
-                if not self.suspicious_users:
+                if not suspicious_users:
                     await update.message.reply_text("✅ Список подозрительных пользователей пуст.")
                 else:
                     response = "📜 Список подозрительных пользователей:\n"
-                    for username, date_added in self.suspicious_users.items():
-                        response += f"• @{username} (добавлен: {date_added})\n"
+                    for label, date_added in suspicious_users.items():
+                        response += f"• {label} (добавлен: {date_added})\n"
                     await update.message.reply_text(response)
 
             elif action == "delete":
@@ -303,12 +525,11 @@ class Karadevfacekid:
 
                 target = parts[2].lower()
                 if target == "all":
-                    self.suspicious_users.clear()
+                    suspicious_users.clear()
                     await update.message.reply_text("✅ Все подозрительные пользователи удалены из списка.")
                 else:
                     username = target.replace("@", "")
-                    if username in self.suspicious_users:
-                        del self.suspicious_users[username]
+                    if suspicious_users.remove(username):
                         await update.message.reply_text(f"✅ Пользователь @{username} удалён из списка подозрительных.")
                     else:
                         await update.message.reply_text(
@@ -325,29 +546,31 @@ class Karadevfacekid:
     async def button_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         query = update.callback_query
         await query.answer()
+        chat = await self.get_chat_state(update.effective_chat.id)
 
         if query.data == "mode_enable":
-            self.is_enabled = True
+            chat.configure(is_enabled=True)
             await query.edit_message_text("✅ Бот включён. Все функции активны.")
         elif query.data == "mode_disable":
-            self.is_enabled = False
+            chat.configure(is_enabled=False)
             await query.edit_message_text("⛔ Бот отключён. Все функции неактивны.")
         elif query.data == "status":
-            status = "✅ Включён" if self.is_enabled else "⛔ Отключён"
+            status = "✅ Включён" if chat.is_enabled else "⛔ Отключён"
             await query.edit_message_text(f"Статус бота: {status}")
         elif query.data == "clearlog":
             try:
-                if os.path.exists(self.LOG_FILE):
-                    with open(self.LOG_FILE, "w", encoding="utf-8") as f:
-                        f.write("")
-                    self.violations = {}
-                    self.violation_messages = {}
-                    await query.edit_message_text("🗑️ Логи с матами очищены.")
-                else:
-                    await query.edit_message_text("⚠️ Логи с матами отсутствуют.")
+                chat.clear_violations()
+                await self.store.clear_violations(chat.chat_id)
+                await query.edit_message_text("🗑️ Логи с матами очищены.")
             except Exception as e:
                 print(f"🚨 Ошибка при очистке логов: {e}")
                 await query.edit_message_text("⚠️ Произошла ошибка при очистке логов.")
+        elif query.data.startswith("hist:"):
+            _, direction, cursor, limit, username = query.data.split(":", 4)
+            before_id, after_id = (int(cursor), None) if direction == "o" else (None, int(cursor))
+            response, reply_markup = await self._history_page(
+                chat.chat_id, username, int(limit), before_id=before_id, after_id=after_id)
+            await query.edit_message_text(response, reply_markup=reply_markup)
         elif query.data == "help":
             help_text = """
                 📜 Доступные команды:
@@ -357,6 +580,7 @@ class Karadevfacekid:
                 • /status — показать текущий статус бота.
                 • /reload — перезагрузить список запрещённых слов.
                 • /hist @username [N] — показать статистику матов для пользователя (по умолчанию N=5).
+                • /top [N] — показать нарушителей чата и худшую репутацию.
                 • /clearlog — очистить логи с матами.
                 • /enemy add @username — добавить пользователя в список подозрительных.
                 • /enemy list — показать список подозрительных пользователей.
@@ -371,9 +595,18 @@ class Karadevfacekid:
     async def is_admin(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
         chat_id = update.message.chat_id
         user_id = update.message.from_user.id
-        admins = await context.bot.get_chat_administrators(chat_id)
+        admins = await self.admin_cache.get(context.bot, chat_id)
         return any(admin.user.id == user_id for admin in admins)
 
+    async def chat_member_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        member_update = update.chat_member or update.my_chat_member
+        if not member_update:
+            return
+        admin_statuses = (ChatMember.ADMINISTRATOR, ChatMember.OWNER)
+        if (member_update.old_chat_member.status in admin_statuses
+                or member_update.new_chat_member.status in admin_statuses):
+            self.admin_cache.invalidate(member_update.chat.id)
+
 
     async def statistics_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         try:
@@ -386,10 +619,10 @@ class Karadevfacekid:
             chat_id = update.message.chat_id
 
             user_status = await self.get_user_status(chat_id, username, context)
-            message_count = self.message_count.get(username, 0)
-            mat_count = self.violations.get(username, 0)
+            counters = await self.store.user_counters(chat_id, username)
+            message_count, mat_count = counters[:2] if counters else (0, 0)
             reputation = self.calculate_reputation(message_count, mat_count)
-            is_dangerous = username in self.suspicious_users
+            is_dangerous = username in (await self.get_chat_state(chat_id)).suspicious_users
 
             response = f"📊 Статистика @{username}:\n"
             response += f"- Кол-во сообщений: {message_count}\n"
@@ -405,7 +638,7 @@ class Karadevfacekid:
 
     async def get_user_status(self, chat_id: int, username: str, context: ContextTypes.DEFAULT_TYPE) -> str:
         try:
-            admins = await context.bot.get_chat_administrators(chat_id)
+            admins = await self.admin_cache.get(context.bot, chat_id)
             for admin in admins:
                 if admin.user.username == username:
                     return "Администратор"
@@ -414,6 +647,24 @@ class Karadevfacekid:
             print(f"🚨 Ошибка при получении статуса пользователя: {e}")
             return "Неизвестно"
 
+    async def memory_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not await self.is_admin(update, context):
+            await update.message.reply_text("⛔ У вас нет прав для выполнения этой команды.")
+            return
+
+        fields = ("message_count", "warning_count", "violations", "suspicious_users")
+        response = "🧠 Использование памяти:\n"
+        response += f"- Чатов: {len(self.chats)}\n"
+        response += f"- Активных пользователей: {len(self.active_users)} (лимит {self.active_users.max_users})\n"
+        total = deep_sizeof(self.active_users)
+        for name in fields:
+            values = [getattr(chat, name) for chat in self.chats.values()]
+            size = sum(deep_sizeof(value) for value in values)
+            total += size
+            response += f"- {name}: {sum(len(value) for value in values)} записей, {size / 1024:.1f} КБ\n"
+        response += f"- Всего: {total / 1024:.1f} КБ"
+        await update.message.reply_text(response)
+
     def calculate_reputation(self, message_count: int, mat_count: int) -> str:
         if message_count == 0:
             return "Нет данных"
@@ -427,14 +678,123 @@ class Karadevfacekid:
         else:
             return "Плохая"
 
-    def run(self):
-        app = ApplicationBuilder().token(self.TOKEN).build()
+    def _sync_chat_states(self):
+        for chat in self.chats.values():
+            if chat.suspicious_users.changes:
+                changes, chat.suspicious_users.changes = chat.suspicious_users.changes, []
+                self.store.update_blacklist(chat.chat_id, changes)
+            if chat.settings_changes:
+                changes, chat.settings_changes = chat.settings_changes, {}
+                self.store.update_settings(chat.chat_id, chat.settings(), changes)
+
+    def _register_state_metrics(self):
+        metrics = self.metrics
+        metrics.register_callback("bot_chats", "gauge", lambda: len(self.chats), "Чатов в памяти")
+        metrics.register_callback("bot_bad_words", "gauge", lambda: len(self.dictionary), "Запрещённых слов в словаре")
+        metrics.register_callback("bot_active_users", "gauge", lambda: len(self.active_users),
+                                  "Пользователей со счётчиками в памяти")
+        metrics.register_callback(
+            "bot_state_entries", "gauge",
+            lambda: {
+                (("dict", name),): sum(len(getattr(chat, name)) for chat in self.chats.values())
+                for name in ("message_count", "warning_count", "violations", "suspicious_users")
+            },
+            "Записей в словарях состояния по всем чатам")
+        metrics.register_callback(
+            "bot_queue_depth", "gauge",
+            lambda: {
+                (("queue", "outbound"),): self.outbound.queued(),
+                (("queue", "violation_log"),): self.log_writer.qsize(),
+                (("queue", "store"),): self.store.pending(),
+            },
+            "Глубина внутренних очередей")
+        metrics.register_callback(
+            "bot_outbound_messages_total", "counter",
+            lambda: {
+                (("result", "sent"),): self.outbound.sent,
+                (("result", "merged"),): self.outbound.merged,
+                (("result", "retried"),): self.outbound.retries,
+                (("result", "dropped"),): self.outbound.dropped,
+            },
+            "Исходящие сообщения")
+        metrics.register_callback("bot_violation_log_dropped_total", "counter", lambda: self.log_writer.dropped,
+                                  "Записи лога, потерянные из-за переполнения очереди")
+        metrics.register_callback(
+            "bot_verdict_cache_total", "counter",
+            lambda: {
+                (("result", "hit"),): self.verdict_cache.hits,
+                (("result", "miss"),): self.verdict_cache.misses,
+            },
+            "Обращения к кэшу вердиктов")
+        metrics.register_callback("bot_flood_mutes_total", "counter", lambda: self.flood_detector.triggered,
+                                  "Пользователи, ограниченные за флуд")
+        metrics.register_callback("bot_scan_timeouts_total", "counter", lambda: self.scanner.timeouts,
+                                  "Длинные сообщения, проверка которых не уложилась в лимит времени")
+
+    def _register_app_metrics(self, app):
+        self.metrics.register_callback(
+            "bot_queue_depth_updates", "gauge", lambda: app.update_queue.qsize(), "Обновлений в очереди приложения")
+        self.metrics.register_callback(
+            "bot_updates_in_progress", "gauge", lambda: app.update_processor.current_concurrent_updates,
+            "Обновлений в обработке")
+        self.metrics.register_callback(
+            "bot_updates_pending", "gauge", lambda: app.update_processor.pending_updates,
+            "Обновлений в обработке или в очереди своего пользователя")
+
+    async def metrics_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not await self.is_admin(update, context):
+            await update.message.reply_text("⛔ У вас нет прав для выполнения этой команды.")
+            return
+        summary = self.metrics.summary() or "Пока нет данных."
+        await update.message.reply_text(f"📈 Метрики:\n{summary}"[:4096])
+
+    async def post_init(self, app):
+        await self.store.open()
+        self.store.start()
+        self.log_writer.start()
+        self.dictionary.start()
+        self.scanner.start(self.dictionary)
+        if app is not None:
+            self._register_app_metrics(app)
+        if self.METRICS_PORT:
+            self.metrics_server = MetricsServer(self.metrics, port=self.METRICS_PORT)
+            try:
+                await self.metrics_server.start()
+            except OSError as e:
+                print(f"⚠️ Не удалось запустить сервер метрик: {e}")
+                self.metrics_server = None
+
+    async def post_stop(self, app):
+        await self.outbound.close()
+
+    async def post_shutdown(self, app):
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        await self.dictionary.stop()
+        await self.scanner.close()
+        await self.log_writer.stop()
+        await self.store.close()
+
+    def build_application(self, request=None):
+        builder = (
+            ApplicationBuilder()
+            .token(self.TOKEN)
+            .concurrent_updates(PerUserUpdateProcessor(self.CONCURRENT_UPDATES))
+            .post_init(self.post_init)
+            .post_stop(self.post_stop)
+            .post_shutdown(self.post_shutdown)
+        )
+        if request is None:
+            request = HTTPXRequest(connection_pool_size=256)
+        builder = builder.request(InstrumentedRequest(request, self.metrics))
+        app = builder.build()
 
         app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.message_handler))
         app.add_handler(MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, self.greet_new_members))
         app.add_handler(CommandHandler("reload", self.reload_command))
         app.add_handler(CommandHandler("clearlog", self.help_command))
         app.add_handler(CommandHandler("hist", self.history_command))
+        app.add_handler(CommandHandler("top", self.top_command))
         app.add_handler(CommandHandler("mode", self.mode_command))
         app.add_handler(CommandHandler("status", self.status_command))
         app.add_handler(CommandHandler("help", self.help_command))
@@ -444,10 +804,54 @@ class Karadevfacekid:
         app.add_handler(CommandHandler("totalcheck", self.total_check_command))
         app.add_handler(CommandHandler("tc", self.total_check_command))
         app.add_handler(CommandHandler("limit", self.set_warning_limit_command))
+        app.add_handler(CommandHandler("memory", self.memory_command))
         app.add_handler(CallbackQueryHandler(self.button_handler))
+        app.add_handler(CommandHandler("metrics", self.metrics_command))
+        app.add_handler(ChatMemberHandler(self.chat_member_handler, ChatMemberHandler.ANY_CHAT_MEMBER))
+
+        for handlers in app.handlers.values():
+            for handler in handlers:
+                handler.callback = self.metrics.timed(
+                    "bot_handler_seconds", handler.callback, handler=handler.callback.__name__)
+
+        return app
+
+    def run(self):
+        app = self.build_application()
 
         print("🤖 Бот запущен!")
-        app.run_polling()
+        app.run_polling(allowed_updates=Update.ALL_TYPES)
+
+    def run_webhook(self, host: str = "127.0.0.1", port: int = 8080, path: str = "/telegram",
+                    secret_token: str = None, webhook_url: str = None, drain_timeout: float = 30.0):
+        asyncio.run(self._serve_webhook(host, port, path, secret_token, webhook_url, drain_timeout))
+
+    async def _serve_webhook(self, host, port, path, secret_token, webhook_url, drain_timeout):
+        app = self.build_application()
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+            except NotImplementedError:
+                pass
+
+        async with app:
+            await self.post_init(app)
+            await app.start()
+            if webhook_url:
+                await app.bot.set_webhook(webhook_url, secret_token=secret_token, allowed_updates=Update.ALL_TYPES)
+            server = WebhookServer(app, host, port, path, secret_token)
+            await server.start()
+            print(f"🤖 Бот запущен! Вебхук слушает http://{server.host}:{server.port}{path}")
+            try:
+                await stop_event.wait()
+            finally:
+                print("⏳ Завершаем обработку оставшихся обновлений...")
+                await server.drain(drain_timeout)
+                await app.stop()
+                await self.post_stop(app)
+                await self.post_shutdown(app)
 
 
 if __name__ == "__main__":
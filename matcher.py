@@ -0,0 +1,99 @@
+import re
+
+TOTAL_SEPARATOR = "[^а-я]*"
+REGEX_SPECIAL = set(".^$*+?{}[]\\|()")
+
+
+def word_pattern(word: str, total_check_mode: bool) -> str:
+    if total_check_mode:
+        pattern = ""
+        for char in word:
+            if char.isalpha():
+                pattern += f"{char}+{TOTAL_SEPARATOR}"
+            else:
+                pattern += re.escape(char)
+        return pattern.rstrip(TOTAL_SEPARATOR)
+    return re.sub(r"(\w)", r"\1+", word)
+
+
+class _TrieNode:
+    __slots__ = ("children", "terminal")
+
+    def __init__(self):
+        self.children = {}
+        self.terminal = False
+
+
+class BadWordsMatcher:
+    def __init__(self, words, base: "BadWordsMatcher" = None):
+        words = tuple(dict.fromkeys(words))
+        if base is None:
+            self.words = words
+            layers = {False: (), True: ()}
+        else:
+            known = set(base.words)
+            words = tuple(word for word in words if word not in known)
+            self.words = base.words + words
+            layers = base.regexes
+        self.regexes = {}
+        for mode in (False, True):
+            regex = self._compile(words, mode)
+            self.regexes[mode] = layers[mode] + ((regex,) if regex is not None else ())
+
+    def __len__(self):
+        return len(self.words)
+
+    @property
+    def layers(self) -> int:
+        return max(len(regexes) for regexes in self.regexes.values())
+
+    def search(self, text: str, total_check_mode: bool = False) -> bool:
+        for regex in self.regexes[total_check_mode]:
+            if regex.search(text) is not None:
+                return True
+        return False
+
+    def _compile(self, words, total_check_mode: bool):
+        root = _TrieNode()
+        standalone = []
+        for word in words:
+            if not total_check_mode and any(c in REGEX_SPECIAL for c in word):
+                standalone.append(word_pattern(word, False))
+                continue
+            node = root
+            for char in word:
+                node = node.children.setdefault(char, _TrieNode())
+            node.terminal = True
+
+        alternatives = []
+        if root.children:
+            alternatives.append(self._node_pattern(root, total_check_mode))
+        for pattern in standalone:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                print(f"🚨 Ошибка в шаблоне {pattern!r}: {e}")
+                continue
+            alternatives.append(f"(?:{pattern})")
+
+        if not alternatives:
+            return None
+        return re.compile("|".join(alternatives))
+
+    def _node_pattern(self, node: _TrieNode, total_check_mode: bool) -> str:
+        branches = []
+        for char, child in node.children.items():
+            if total_check_mode:
+                token = f"{char}+" if char.isalpha() else re.escape(char)
+                separator = TOTAL_SEPARATOR if char.isalpha() else ""
+            elif re.match(r"\w", char):
+                token, separator = f"{char}+", ""
+            else:
+                token, separator = re.escape(char), ""
+            if child.terminal or not child.children:
+                branches.append(token)
+            else:
+                branches.append(token + separator + self._node_pattern(child, total_check_mode))
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
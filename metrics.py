@@ -0,0 +1,215 @@
+import asyncio
+import time
+from bisect import bisect_left
+
+from telegram.request import BaseRequest
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0)
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._callbacks = []
+        self._help = {}
+
+    def histogram(self, name: str, help_text: str = "", **labels) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram()
+            self._help.setdefault(name, (help_text, "histogram"))
+        return histogram
+
+    def inc(self, name: str, value: float = 1, help_text: str = "", **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0) + value
+        if name not in self._help:
+            self._help[name] = (help_text, "counter")
+
+    def register_callback(self, name: str, metric_type: str, callback, help_text: str = ""):
+        self._callbacks.append((name, callback))
+        self._help[name] = (help_text, metric_type)
+
+    def render(self) -> str:
+        samples = {}
+        for (name, labels), value in self._counters.items():
+            samples.setdefault(name, []).append(f"{name}{_format_labels(labels)} {value}")
+        for name, callback in self._callbacks:
+            try:
+                values = callback()
+            except Exception as e:
+                print(f"⚠️ Ошибка сбора метрики {name}: {e}")
+                continue
+            if not isinstance(values, dict):
+                values = {(): values}
+            for labels, value in values.items():
+                samples.setdefault(name, []).append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), histogram in self._histograms.items():
+            lines = samples.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                bucket_labels = labels + (("le", repr(bound)),)
+                lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+        output = []
+        for name in sorted(samples):
+            help_text, metric_type = self._help.get(name, ("", "untyped"))
+            if help_text:
+                output.append(f"# HELP {name} {help_text}")
+            output.append(f"# TYPE {name} {metric_type}")
+            output.extend(samples[name])
+        return "\n".join(output) + "\n"
+
+    def summary(self) -> str:
+        lines = []
+        for (name, labels), histogram in sorted(self._histograms.items()):
+            if not histogram.count:
+                continue
+            average = histogram.sum / histogram.count * 1000
+            lines.append(
+                f"• {name}{_format_labels(labels)}: n={histogram.count}, среднее={average:.2f} мс, "
+                f"p99≤{histogram.quantile(0.99) * 1000:g} мс"
+            )
+        for (name, labels), value in sorted(self._counters.items()):
+            lines.append(f"• {name}{_format_labels(labels)}: {value:g}")
+        for name, callback in self._callbacks:
+            try:
+                values = callback()
+            except Exception:
+                continue
+            if not isinstance(values, dict):
+                values = {(): values}
+            for labels, value in values.items():
+                lines.append(f"• {name}{_format_labels(labels)}: {value:g}")
+        return "\n".join(lines)
+
+    def timed(self, name: str, callback, **labels):
+        histogram = self.histogram(name, **labels)
+
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await callback(*args, **kwargs)
+            except Exception:
+                self.inc(f"{name}_errors_total", **labels)
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started)
+
+        return wrapper
+
+
+class InstrumentedRequest(BaseRequest):
+    def __init__(self, inner: BaseRequest, registry: MetricsRegistry):
+        self.inner = inner
+        self.registry = registry
+
+    @property
+    def read_timeout(self):
+        return self.inner.read_timeout
+
+    async def initialize(self):
+        await self.inner.initialize()
+
+    async def shutdown(self):
+        await self.inner.shutdown()
+
+    async def do_request(self, url, method, request_data=None, read_timeout=BaseRequest.DEFAULT_NONE,
+                         write_timeout=BaseRequest.DEFAULT_NONE, connect_timeout=BaseRequest.DEFAULT_NONE,
+                         pool_timeout=BaseRequest.DEFAULT_NONE):
+        api_method = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        try:
+            code, payload = await self.inner.do_request(
+                url, method, request_data, read_timeout=read_timeout, write_timeout=write_timeout,
+                connect_timeout=connect_timeout, pool_timeout=pool_timeout,
+            )
+        except Exception as e:
+            self.registry.inc("telegram_api_errors_total", method=api_method, error=type(e).__name__)
+            raise
+        finally:
+            self.registry.histogram(
+                "telegram_api_seconds", "Время вызовов Telegram Bot API", method=api_method
+            ).observe(time.perf_counter() - started)
+        self.registry.inc("telegram_api_calls_total", method=api_method, code=code)
+        if code >= 400:
+            self.registry.inc("telegram_api_errors_total", method=api_method, error=str(code))
+        return code, payload
+
+
+class MetricsServer:
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?", 1)[0] == "/metrics":
+                status, body = "200 OK", self.registry.render().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,57 @@
+import re
+import unicodedata
+
+INVISIBLE_RANGES = (
+    (0x00AD, 0x00AD), (0x034F, 0x034F), (0x061C, 0x061C), (0x115F, 0x1160), (0x17B4, 0x17B5),
+    (0x180B, 0x180E), (0x200B, 0x200F), (0x202A, 0x202E), (0x2060, 0x2064), (0x2066, 0x206F),
+    (0x3164, 0x3164), (0xFE00, 0xFE0F), (0xFEFF, 0xFEFF), (0xFFA0, 0xFFA0),
+    (0x0300, 0x036F), (0x0483, 0x0489), (0x1AB0, 0x1AFF), (0x1DC0, 0x1DFF), (0x20D0, 0x20FF),
+    (0xFE20, 0xFE2F),
+)
+INVISIBLE_TABLE = {code: None for start, end in INVISIBLE_RANGES for code in range(start, end + 1)}
+INVISIBLE = re.compile("[" + "".join(f"\\u{start:04x}-\\u{end:04x}" for start, end in INVISIBLE_RANGES) + "]")
+
+MIXED_TOKEN = re.compile(r"(?<!\S)[^\sа-яё]*[а-яё]\S*")
+REPEATS = re.compile(r"(.)\1\1+", re.S)
+
+
+def load_mapping(path: str):
+    table = {}
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            sources, target = line.rsplit(maxsplit=1)
+            for char in sources.lower():
+                table[ord(char)] = target
+    return table
+
+
+class TextNormalizer:
+    def __init__(self, mapping_file: str = "homoglyphs.txt"):
+        self.mapping_file = mapping_file
+        try:
+            self.fold_table = load_mapping(mapping_file)
+        except Exception as e:
+            print(f"🚨 Ошибка загрузки замен символов: {e}")
+            self.fold_table = {}
+        if self.fold_table:
+            self._foldable = re.compile("[" + re.escape("".join(map(chr, self.fold_table))) + "]")
+        else:
+            self._foldable = None
+
+    def normalize(self, text: str) -> str:
+        if not unicodedata.is_normalized("NFKC", text):
+            text = unicodedata.normalize("NFKC", text)
+        text = text.lower()
+        if INVISIBLE.search(text):
+            text = text.translate(INVISIBLE_TABLE)
+        if self._foldable is not None and self._foldable.search(text):
+            text = MIXED_TOKEN.sub(self._fold_token, text)
+        if REPEATS.search(text):
+            text = REPEATS.sub(r"\1\1", text)
+        return text
+
+    def _fold_token(self, match) -> str:
+        return match.group().translate(self.fold_table)
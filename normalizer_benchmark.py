@@ -0,0 +1,90 @@
+import argparse
+import random
+import statistics
+import time
+
+from benchmark import CLEAN_WORDS, generate_corpus, percentile
+from dictionary import read_words
+from matcher import BadWordsMatcher
+from normalizer import TextNormalizer
+
+INVISIBLE_CHARS = ["\u200b", "\u200c", "\u200d", "\u00ad", "\u2060", "\ufeff"]
+
+
+def disguise(rng: random.Random, word: str, lookalikes) -> str:
+    result = ""
+    for char in word:
+        if char in lookalikes and rng.random() < 0.5:
+            char = rng.choice(lookalikes[char])
+        elif char.isalpha() and rng.random() < 0.2:
+            char = char * rng.randint(3, 6)
+        result += char
+        if rng.random() < 0.2:
+            result += rng.choice(INVISIBLE_CHARS)
+    return result
+
+
+def disguised_message(rng: random.Random, bad_words, lookalikes) -> str:
+    words = [rng.choice(CLEAN_WORDS) for _ in range(rng.randint(1, 30))]
+    words.insert(rng.randrange(len(words) + 1), disguise(rng, rng.choice(bad_words), lookalikes))
+    return " ".join(words)
+
+
+def reverse_table(fold_table):
+    lookalikes = {}
+    for code, target in fold_table.items():
+        lookalikes.setdefault(target, []).append(chr(code))
+    return lookalikes
+
+
+def detection_rate(matcher: BadWordsMatcher, texts, prepare, total_check_mode: bool) -> float:
+    return sum(matcher.search(prepare(text), total_check_mode) for text in texts) / len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микро-бенчмарк нормализации текста")
+    parser.add_argument("--bad-words", default="badwords.txt")
+    parser.add_argument("--mapping", default="homoglyphs.txt")
+    parser.add_argument("--count", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    bad_words = read_words(args.bad_words)
+    matcher = BadWordsMatcher(bad_words)
+    normalizer = TextNormalizer(args.mapping)
+    rng = random.Random(args.seed)
+    lookalikes = reverse_table(normalizer.fold_table)
+
+    generated = generate_corpus(bad_words, args.count, args.seed)
+    corpus = [text for _, text in generated]
+    clean = [text for kind, text in generated if kind == "clean"]
+    disguised = [disguised_message(rng, bad_words, lookalikes) for _ in range(args.count)]
+
+    for name, texts in (("обычные", corpus), ("замаскированные", disguised)):
+        latencies = []
+        started = time.perf_counter()
+        for text in texts:
+            t0 = time.perf_counter_ns()
+            normalizer.normalize(text)
+            latencies.append(time.perf_counter_ns() - t0)
+        elapsed = time.perf_counter() - started
+        print(
+            f"⏱️ {name:>15}: {len(texts) / elapsed:10.0f} сообщ/с, "
+            f"p50={percentile(latencies, 0.5) / 1000:.1f} мкс, p99={percentile(latencies, 0.99) / 1000:.1f} мкс, "
+            f"среднее={statistics.fmean(latencies) / 1000:.1f} мкс"
+        )
+
+    for mode in (False, True):
+        label = "total" if mode else "normal"
+        before = detection_rate(matcher, disguised, str.lower, mode)
+        after = detection_rate(matcher, disguised, normalizer.normalize, mode)
+        false_before = detection_rate(matcher, clean, str.lower, mode)
+        false_after = detection_rate(matcher, clean, normalizer.normalize, mode)
+        print(
+            f"🎯 {label:>6}: найдено замаскированных {before:.1%} → {after:.1%}, "
+            f"срабатываний на чистых {false_before:.1%} → {false_after:.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
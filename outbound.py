@@ -0,0 +1,166 @@
+import asyncio
+import time
+from datetime import timedelta
+
+from telegram import ReplyParameters
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+MAX_MESSAGE_LENGTH = 4096
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated", "blocked_until")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 0:
+            wait = max(wait, -self.tokens / self.rate)
+        return wait
+
+    def block(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def retry_after_seconds(e: RetryAfter) -> float:
+    value = e.retry_after
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+class OutboundScheduler:
+    def __init__(self, per_chat_rate: float = 20 / 60, per_chat_burst: int = 3, global_rate: float = 25,
+                 global_burst: int = 25, merge_window: float = 0.5, max_retries: int = 5):
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.merge_window = merge_window
+        self.max_retries = max_retries
+        self._global = TokenBucket(global_rate, global_burst)
+        self._chat_buckets = {}
+        self._pending = {}
+        self._workers = {}
+        self.sent = 0
+        self.merged = 0
+        self.retries = 0
+        self.dropped = 0
+
+    def send_message(self, bot, chat_id: int, text: str, reply_to_message_id: int = None):
+        self._pending.setdefault(chat_id, []).append((text, reply_to_message_id))
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._drain_chat(bot, chat_id))
+
+    def queued(self) -> int:
+        return sum(len(items) for items in self._pending.values())
+
+    async def call(self, factory, chat_id: int = None, idempotent: bool = True):
+        bucket = self._chat_bucket(chat_id) if chat_id is not None else None
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await factory()
+            except RetryAfter as e:
+                delay = retry_after_seconds(e)
+                print(f"⏳ Лимит Telegram, повтор через {delay:.0f} с")
+                if bucket is not None:
+                    bucket.block(delay)
+                else:
+                    self._global.block(delay)
+                await asyncio.sleep(delay)
+            except (BadRequest, Forbidden):
+                raise
+            except NetworkError as e:
+                if isinstance(e.__cause__, RuntimeError) or (isinstance(e, TimedOut) and not idempotent):
+                    raise
+                print(f"⚠️ Сетевая ошибка Telegram: {e}")
+                await asyncio.sleep(min(30.0, 0.5 * 2 ** attempt))
+            self.retries += 1
+        raise NetworkError("превышено число попыток отправки")
+
+    async def close(self, timeout: float = 10.0):
+        workers = list(self._workers.values())
+        if not workers:
+            return
+        _, pending = await asyncio.wait(workers, timeout=timeout)
+        for worker in pending:
+            worker.cancel()
+        if pending:
+            await asyncio.wait(pending)
+            self.dropped += self.queued()
+            self._pending.clear()
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, self.per_chat_burst)
+        return bucket
+
+    async def _drain_chat(self, bot, chat_id: int):
+        bucket = self._chat_bucket(chat_id)
+        chunks = []
+        try:
+            await asyncio.sleep(self.merge_window)
+            while self._pending.get(chat_id):
+                await bucket.acquire()
+                await self._global.acquire()
+                items = self._pending.pop(chat_id)
+                self.merged += len(items) - 1
+                chunks = self._merge(items)
+                while chunks:
+                    text, reply_to_message_id, count = chunks[0]
+                    await self._send(bot, chat_id, text, reply_to_message_id, count)
+                    chunks.pop(0)
+                    if chunks:
+                        await bucket.acquire()
+                        await self._global.acquire()
+        except asyncio.CancelledError:
+            self.dropped += sum(count for _, _, count in chunks)
+            raise
+        finally:
+            self._workers.pop(chat_id, None)
+
+    async def _send(self, bot, chat_id: int, text: str, reply_to_message_id: int = None, count: int = 1):
+        reply_parameters = None
+        if reply_to_message_id is not None:
+            reply_parameters = ReplyParameters(reply_to_message_id, allow_sending_without_reply=True)
+        try:
+            await self.call(
+                lambda: bot.send_message(chat_id=chat_id, text=text, reply_parameters=reply_parameters),
+                chat_id,
+                idempotent=False,
+            )
+            self.sent += 1
+        except Exception as e:
+            self.dropped += count
+            print(f"🚨 Не удалось отправить сообщение в чат {chat_id}: {e}")
+
+    @staticmethod
+    def _merge(items):
+        if len(items) == 1:
+            text, reply_to_message_id = items[0]
+            return [(text, reply_to_message_id, 1)]
+        chunks = []
+        current = ""
+        count = 0
+        for text, _ in items:
+            if current and len(current) + 1 + len(text) > MAX_MESSAGE_LENGTH:
+                chunks.append((current, None, count))
+                current = ""
+                count = 0
+            current = f"{current}\n{text}" if current else text[:MAX_MESSAGE_LENGTH]
+            count += 1
+        if current:
+            chunks.append((current, None, count))
+        return chunks
@@ -0,0 +1,104 @@
+import asyncio
+import multiprocessing
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from matcher import BadWordsMatcher
+
+_matcher = None
+
+
+class ScanTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise ScanTimeout()
+
+
+def _init_worker(words):
+    global _matcher
+    _matcher = BadWordsMatcher(words)
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGALRM, _on_alarm)
+
+
+def _scan(text: str, total_check_mode: bool, time_budget: float):
+    has_timer = hasattr(signal, "setitimer")
+    try:
+        if has_timer:
+            signal.setitimer(signal.ITIMER_REAL, time_budget)
+        try:
+            return _matcher.search(text, total_check_mode)
+        finally:
+            if has_timer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except ScanTimeout:
+        return None
+
+
+class LongMessageScanner:
+    def __init__(self, threshold: int = 1024, time_budget: float = 0.5, max_workers: int = 2,
+                 startup_grace: float = 10.0):
+        self.threshold = threshold
+        self.time_budget = time_budget
+        self.max_workers = max_workers
+        self.startup_grace = startup_grace
+        self.scanned = 0
+        self.timeouts = 0
+        self._pool = None
+        self._version = None
+
+    def should_offload(self, text: str) -> bool:
+        return self.threshold is not None and len(text) >= self.threshold
+
+    def start(self, dictionary):
+        if self.threshold is None:
+            return
+        pool = self._get_pool(dictionary)
+        for _ in range(self.max_workers):
+            pool.submit(_scan, "", False, self.time_budget)
+
+    async def scan(self, dictionary, text: str, total_check_mode: bool):
+        pool = self._get_pool(dictionary)
+        loop = asyncio.get_running_loop()
+        self.scanned += 1
+        try:
+            verdict = await asyncio.wait_for(
+                loop.run_in_executor(pool, _scan, text, total_check_mode, self.time_budget),
+                self.time_budget + self.startup_grace,
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._discard_pool()
+            raise
+        except BrokenProcessPool:
+            self._discard_pool()
+            raise
+        if verdict is None:
+            self.timeouts += 1
+        return verdict
+
+    async def close(self):
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+    def _get_pool(self, dictionary) -> ProcessPoolExecutor:
+        if self._pool is not None and self._version != dictionary.version:
+            self._discard_pool()
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(dictionary.matcher.words,),
+            )
+            self._version = dictionary.version
+        return self._pool
+
+    def _discard_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=False)
+            self._pool = None
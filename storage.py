@@ -0,0 +1,297 @@
+import asyncio
+import sqlite3
+import sys
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    chat_id INTEGER NOT NULL,
+    username TEXT NOT NULL,
+    messages INTEGER NOT NULL DEFAULT 0,
+    violations INTEGER NOT NULL DEFAULT 0,
+    warnings INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (chat_id, username)
+);
+CREATE TABLE IF NOT EXISTS violation_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id INTEGER NOT NULL,
+    username TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_violation_messages_user ON violation_messages (chat_id, username, id);
+CREATE INDEX IF NOT EXISTS idx_violation_messages_time ON violation_messages (chat_id, timestamp);
+CREATE TABLE IF NOT EXISTS suspicious_users (
+    chat_id INTEGER NOT NULL,
+    name TEXT,
+    user_id INTEGER,
+    date_added TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_suspicious_users_chat ON suspicious_users (chat_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_suspicious_users_name ON suspicious_users (chat_id, name);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_suspicious_users_id ON suspicious_users (chat_id, user_id) WHERE name IS NULL;
+CREATE TABLE IF NOT EXISTS chat_settings (
+    chat_id INTEGER PRIMARY KEY,
+    is_enabled INTEGER NOT NULL,
+    total_check_mode INTEGER NOT NULL,
+    warning_limit INTEGER NOT NULL
+);
+"""
+
+SETTINGS_COLUMNS = ("is_enabled", "total_check_mode", "warning_limit")
+
+
+class StateStore:
+    def __init__(self, path: str, flush_interval: float = 5.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._conn = None
+        self._lock = threading.Lock()
+        self._deltas = {}
+        self._violations = []
+        self._blacklists = {}
+        self._settings = {}
+        self._task = None
+        self._flush_lock = asyncio.Lock()
+        self.on_flush = None
+
+    def increment(self, chat_id: int, username: str, messages: int = 0, violations: int = 0, warnings: int = 0):
+        if username is None:
+            return
+        delta = self._deltas.get((chat_id, username))
+        if delta is None:
+            self._deltas[(chat_id, username)] = [messages, violations, warnings]
+        else:
+            delta[0] += messages
+            delta[1] += violations
+            delta[2] += warnings
+
+    def add_violation(self, chat_id: int, username: str, timestamp: str, text: str):
+        if username is None:
+            return
+        self._violations.append((chat_id, username, timestamp, text))
+
+    def update_blacklist(self, chat_id: int, changes):
+        self._blacklists.setdefault(chat_id, []).extend(changes)
+
+    def update_settings(self, chat_id: int, values, changes):
+        pending = self._settings.get(chat_id)
+        self._settings[chat_id] = (values, {**pending[1], **changes} if pending else dict(changes))
+
+    def pending(self) -> int:
+        return len(self._deltas) + len(self._violations)
+
+    async def open(self):
+        await asyncio.to_thread(self._connect)
+
+    async def load_chat(self, chat_id: int):
+        settings = await asyncio.to_thread(
+            self._query_one,
+            "SELECT is_enabled, total_check_mode, warning_limit FROM chat_settings WHERE chat_id = ?",
+            (chat_id,),
+        )
+        blacklist = await asyncio.to_thread(
+            self._query, "SELECT name, user_id, date_added FROM suspicious_users WHERE chat_id = ?", (chat_id,)
+        )
+        return settings, blacklist
+
+    async def load_user(self, chat_id: int, username: str):
+        async with self._flush_lock:
+            row = await asyncio.to_thread(
+                self._query_one,
+                "SELECT messages, violations, warnings FROM counters WHERE chat_id = ? AND username = ?",
+                (chat_id, username),
+            )
+        counters = list(row) if row else [0, 0, 0]
+        for i, value in enumerate(self._deltas.get((chat_id, username), ())):
+            counters[i] += value
+        return counters
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        finally:
+            await asyncio.to_thread(self._disconnect)
+
+    async def flush(self):
+        if self.on_flush:
+            self.on_flush()
+        async with self._flush_lock:
+            if not (self._deltas or self._violations or self._blacklists or self._settings):
+                return
+            deltas, self._deltas = self._deltas, {}
+            violations, self._violations = self._violations, []
+            blacklists, self._blacklists = self._blacklists, {}
+            settings, self._settings = self._settings, {}
+            try:
+                await asyncio.to_thread(self._write, deltas, violations, blacklists, settings)
+            except Exception:
+                self._requeue(deltas, violations, blacklists, settings)
+                raise
+
+    def _requeue(self, deltas, violations, blacklists, settings):
+        for key, delta in self._deltas.items():
+            pending = deltas.get(key)
+            if pending is None:
+                deltas[key] = delta
+            else:
+                deltas[key] = [old + new for old, new in zip(pending, delta)]
+        self._deltas = deltas
+        self._violations = violations + self._violations
+        for chat_id, changes in self._blacklists.items():
+            blacklists.setdefault(chat_id, []).extend(changes)
+        self._blacklists = blacklists
+        for chat_id, (values, changes) in self._settings.items():
+            pending = settings.get(chat_id)
+            settings[chat_id] = (values, {**pending[1], **changes} if pending else changes)
+        self._settings = settings
+
+    async def user_counters(self, chat_id: int, username: str):
+        await self.flush()
+        return await asyncio.to_thread(
+            self._query_one,
+            "SELECT messages, violations, warnings FROM counters WHERE chat_id = ? AND username = ?",
+            (chat_id, username),
+        )
+
+    async def violation_page(self, chat_id: int, username: str, limit: int, before_id: int = None,
+                             after_id: int = None):
+        await self.flush()
+        if after_id is not None:
+            rows = await asyncio.to_thread(
+                self._query,
+                "SELECT id, timestamp, text FROM violation_messages WHERE chat_id = ? AND username = ? AND id > ? "
+                "ORDER BY id ASC LIMIT ?",
+                (chat_id, username, after_id, limit + 1),
+            )
+            has_newer = len(rows) > limit
+            return rows[:limit], has_newer, True
+        if before_id is None:
+            before_id = sys.maxsize
+        rows = await asyncio.to_thread(
+            self._query,
+            "SELECT id, timestamp, text FROM violation_messages WHERE chat_id = ? AND username = ? AND id < ? "
+            "ORDER BY id DESC LIMIT ?",
+            (chat_id, username, before_id, limit + 1),
+        )
+        has_older = len(rows) > limit
+        return rows[:limit][::-1], before_id != sys.maxsize, has_older
+
+    async def load_aggregates(self, chat_id: int, since: str):
+        await self.flush()
+        counters = await asyncio.to_thread(
+            self._query,
+            "SELECT username, messages, violations FROM counters WHERE chat_id = ? AND violations > 0",
+            (chat_id,),
+        )
+        minutes = await asyncio.to_thread(
+            self._query,
+            "SELECT substr(timestamp, 1, 16) AS minute, COUNT(*) FROM violation_messages "
+            "WHERE chat_id = ? AND timestamp >= ? GROUP BY minute ORDER BY minute",
+            (chat_id, since),
+        )
+        return counters, minutes
+
+    async def clear_violations(self, chat_id: int):
+        async with self._flush_lock:
+            for (delta_chat_id, _), delta in self._deltas.items():
+                if delta_chat_id == chat_id:
+                    delta[1] = 0
+            self._violations = [row for row in self._violations if row[0] != chat_id]
+            await asyncio.to_thread(self._clear_violations, chat_id)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"🚨 Ошибка сохранения состояния: {e}")
+
+    def _connect(self):
+        with self._lock:
+            if self._conn is not None:
+                return
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def _disconnect(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _write(self, deltas, violations, blacklists, settings):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO counters (chat_id, username, messages, violations, warnings) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(chat_id, username) DO UPDATE SET messages = messages + excluded.messages, "
+                "violations = violations + excluded.violations, warnings = warnings + excluded.warnings",
+                [(chat_id, username, *delta) for (chat_id, username), delta in deltas.items()],
+            )
+            self._conn.executemany(
+                "INSERT INTO violation_messages (chat_id, username, timestamp, text) VALUES (?, ?, ?, ?)", violations
+            )
+            for chat_id, changes in blacklists.items():
+                for change in changes:
+                    self._write_blacklist_change(chat_id, *change)
+            for chat_id, (values, changes) in settings.items():
+                updates = ", ".join(f"{column} = excluded.{column}" for column in SETTINGS_COLUMNS if column in changes)
+                self._conn.execute(
+                    "INSERT INTO chat_settings (chat_id, is_enabled, total_check_mode, warning_limit) "
+                    f"VALUES (?, ?, ?, ?) ON CONFLICT(chat_id) DO UPDATE SET {updates}",
+                    (chat_id, *values),
+                )
+
+    def _write_blacklist_change(self, chat_id: int, action: str, name: str = None, user_id: int = None,
+                                date_added: str = None):
+        if action == "clear":
+            self._conn.execute("DELETE FROM suspicious_users WHERE chat_id = ?", (chat_id,))
+        elif action == "delete":
+            self._conn.execute(
+                "DELETE FROM suspicious_users WHERE chat_id = ? AND (name = ? OR user_id = ?)", (chat_id, name, user_id)
+            )
+        elif name is None:
+            self._conn.execute(
+                "INSERT INTO suspicious_users (chat_id, name, user_id, date_added) VALUES (?, NULL, ?, ?) "
+                "ON CONFLICT(chat_id, user_id) WHERE name IS NULL DO UPDATE SET date_added = excluded.date_added",
+                (chat_id, user_id, date_added),
+            )
+        else:
+            if user_id is not None:
+                self._conn.execute(
+                    "DELETE FROM suspicious_users WHERE chat_id = ? AND user_id = ? AND name IS NULL",
+                    (chat_id, user_id),
+                )
+            self._conn.execute(
+                "INSERT INTO suspicious_users (chat_id, name, user_id, date_added) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(chat_id, name) DO UPDATE SET user_id = coalesce(excluded.user_id, user_id), "
+                "date_added = excluded.date_added",
+                (chat_id, name, user_id, date_added),
+            )
+
+    def _clear_violations(self, chat_id: int):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM violation_messages WHERE chat_id = ?", (chat_id,))
+            self._conn.execute("UPDATE counters SET violations = 0 WHERE chat_id = ?", (chat_id,))
+
+    def _query(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _query_one(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
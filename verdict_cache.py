@@ -0,0 +1,49 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class VerdictCache:
+    def __init__(self, max_size: int = 10000, ttl: float = 600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(text: str, total_check_mode: bool):
+        digest = hashlib.blake2b(text.lower().strip().encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        return total_check_mode, digest
+
+    def get(self, version, key, now: float = None):
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+        entry = self._entries.get(key)
+        if entry is not None:
+            verdict, expires_at = entry
+            if expires_at > (time.monotonic() if now is None else now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return verdict
+            del self._entries[key]
+        self.misses += 1
+        return MISSING
+
+    def put(self, version, key, verdict, now: float = None):
+        if version != self.version:
+            return
+        self._entries[key] = (verdict, (time.monotonic() if now is None else now) + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import time
+
+_STOP = "stop"
+
+
+class ViolationLogWriter:
+    def __init__(self, path: str, batch_size: int = 200, flush_interval: float = 1.0,
+                 max_bytes: int = 5 * 1024 * 1024, rotate_interval: float = 24 * 60 * 60,
+                 backup_count: int = 5, max_queue: int = 10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._task = None
+        self._file = None
+        self._opened_at = 0.0
+        self.dropped = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        await self._queue.put((_STOP, None))
+        await self._task
+        self._task = None
+
+    def write(self, line: str):
+        try:
+            self._queue.put_nowait(line)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print(f"⚠️ Очередь лога переполнена, запись пропущена ({self.dropped})")
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size and isinstance(batch[-1], str):
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            lines = [item for item in batch if isinstance(item, str)]
+            if lines:
+                try:
+                    await asyncio.to_thread(self._write_lines, lines)
+                except Exception as e:
+                    print(f"⚠️ Ошибка записи в лог: {e}")
+
+            command, _ = batch[-1] if not isinstance(batch[-1], str) else (None, None)
+            if command == _STOP:
+                await asyncio.to_thread(self._close)
+                return
+
+    def _write_lines(self, lines):
+        if self._file is None:
+            self._open()
+        if self._should_rotate():
+            self._rotate()
+        self._file.write("".join(lines))
+        self._file.flush()
+
+    def _open(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._opened_at = time.time()
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _should_rotate(self) -> bool:
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            return True
+        return bool(self.rotate_interval) and time.time() - self._opened_at >= self.rotate_interval
+
+    def _rotate(self):
+        self._close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{i}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{i + 1}")
+            if os.path.exists(self.path):
+                os.replace(self.path, f"{self.path}.1")
+        else:
+            open(self.path, "w", encoding="utf-8").close()
+        self._open()
@@ -0,0 +1,124 @@
+import asyncio
+import hmac
+import json
+from http import HTTPStatus
+
+from telegram import Update
+
+MAX_BODY_SIZE = 1024 * 1024
+
+
+class WebhookServer:
+    def __init__(self, app, host: str = "127.0.0.1", port: int = 8080, path: str = "/telegram",
+                 secret_token: str = None, health_path: str = "/health"):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.path = path
+        self.secret_token = secret_token
+        self.health_path = health_path
+        self.draining = False
+        self._server = None
+        self._connections = set()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def drain(self, timeout: float = 30.0):
+        self.draining = True
+        if self._server is not None:
+            self._server.close()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while loop.time() < deadline and not self._is_idle():
+            await asyncio.sleep(0.05)
+        for writer in list(self._connections):
+            writer.close()
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+
+    def _is_idle(self) -> bool:
+        processor = self.app.update_processor
+        return (
+            self.app.update_queue.empty()
+            and processor.current_concurrent_updates == 0
+            and getattr(processor, "pending_updates", 0) == 0
+        )
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            while not self.draining:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                status, payload = await self._dispatch(method, target.split("?", 1)[0], headers, body)
+                keep_alive = headers.get("connection", "").lower() != "close" and not self.draining
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_SIZE:
+            raise ValueError("request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    async def _dispatch(self, method: str, path: str, headers, body: bytes):
+        if path == self.health_path:
+            if method != "GET":
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "method not allowed"}
+            if self.draining:
+                return HTTPStatus.SERVICE_UNAVAILABLE, {"status": "draining"}
+            return HTTPStatus.OK, {"status": "ok", "queued_updates": self.app.update_queue.qsize()}
+
+        if path != self.path:
+            return HTTPStatus.NOT_FOUND, {"error": "not found"}
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "method not allowed"}
+        if self.secret_token is not None:
+            received = headers.get("x-telegram-bot-api-secret-token", "")
+            if not hmac.compare_digest(received.encode(), self.secret_token.encode()):
+                return HTTPStatus.FORBIDDEN, {"error": "invalid secret token"}
+        if self.draining:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "draining"}
+
+        try:
+            update = Update.de_json(json.loads(body), self.app.bot)
+        except Exception as e:
+            print(f"⚠️ Некорректное обновление от вебхука: {e}")
+            return HTTPStatus.BAD_REQUEST, {"error": "invalid update"}
+        await self.app.update_queue.put(update)
+        return HTTPStatus.OK, {"ok": True}
+
+    async def _write_response(self, writer: asyncio.StreamWriter, status: HTTPStatus, payload, keep_alive: bool):
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()